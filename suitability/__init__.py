@@ -0,0 +1,21 @@
+"""Monthly maize land suitability analysis for the mainland United States
+
+Run `python -m suitability --help` for the command line. Modules:
+
+- classify: criteria table, vectorized scoring and per-month summaries (numpy/pandas only)
+- cube: dense counties x months x variables float32 input cube, scored and summarized directly
+- pipeline: in-memory, streamed and incremental runs that write the monthly outputs
+- maps, static_maps, summary: plotly maps, static PNG maps, charts and INDEX.html
+- geometry: local county GeoJSON and its topology-preserving simplified, quantized version
+- scenarios: batched scenario sweeps over alternative criteria
+- shards: per-state shards with mergeable partial results, and merging them
+- optimal, bootstrap: optimal growing conditions and their bootstrap intervals
+- input_cache, result_store, query: columnar input cache, result store and its queries
+- windows: rolling growing-season window statistics from prefix sums over the result store
+- spatial: sparse county adjacency, neighbour-smoothed scores and Moran's I per month
+- benchmark: synthetic TotalMerged-shaped data and per-stage timing and memory benchmarks
+- writer: bounded background writer threads for maps, CSVs and charts
+- trace: optional per-stage wall/CPU time, peak RSS and row counts as a Chrome trace
+
+Importing the package does not import any of them.
+"""
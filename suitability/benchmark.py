@@ -0,0 +1,470 @@
+"""Stage benchmarks on synthetic TotalMerged-shaped data
+
+The real input is not in the repository, so `python -m suitability bench` generates a
+merged table at a chosen number of counties and months, runs every stage of both analyses
+on it in a scratch directory and records wall time, CPU time and peak traced memory per
+stage. Results are JSON files under BENCHMARK_DIR; compare_results diffs two of them.
+"""
+
+import pandas as pd
+import numpy as np
+from datetime import datetime
+import gc
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+from .paths import (INPUT_CSV, DATA_DIR, MAPS_DIR, PNG_DIR, SUMMARY_DIR, OPTIMAL_DIR, RESULT_STORE_PATH,
+                    BENCHMARK_DIR, month_name, month_csv_path, month_map_path)
+
+RESULT_VERSION = 1
+
+# Growing season used for the GS_* columns, as in the yield table
+GS_MONTHS = range(4, 10)
+
+MERGED_COLUMNS = ['FIPS', 'Year', 'Month', 'ppt', 'tmin', 'tmean', 'tmax', 'mukey', 'ph', 'om', 'clay',
+                  'sand', 'aws', 'db', 'Yield', 'GS_ppt_total', 'GS_tmean_avg', 'GS_tmin_avg', 'GS_tmax_avg']
+
+STAGES = ['load_csv', 'build_cache', 'load_cached', 'classify', 'classify_reference', 'load_cube',
+          'classify_cube', 'partition', 'aggregate', 'write_csvs', 'result_store', 'map_html',
+          'png_raster', 'map_png', 'summary', 'optimal_tables', 'optimal_figures']
+
+# Differences below these are treated as noise by compare_results
+MIN_TIME_DELTA = 0.005
+MIN_MEMORY_DELTA_MB = 1.0
+
+def synthetic_counties(n_counties, seed=0):
+    """FIPS codes spread over the lower-48 states, laid out on a lon/lat grid, with soil properties"""
+
+    from .static_maps import STATE_FIPS
+
+    states = sorted(STATE_FIPS - {'02', '15'})
+    if n_counties > len(states) * 500:
+        raise ValueError(f"At most {len(states) * 500} synthetic counties (3-digit county codes)")
+
+    rng = np.random.default_rng([seed, 1])
+    index = np.arange(n_counties)
+    state = index * len(states) // n_counties
+    county = index - np.searchsorted(state, state)
+    fips = [f"{states[s]}{1 + 2 * c:03d}" for s, c in zip(state, county)]
+
+    # Grid over the conterminous US, roughly as wide as it is tall in km
+    cols = int(np.ceil(np.sqrt(n_counties * 2.4)))
+    rows = int(np.ceil(n_counties / cols))
+    dlon, dlat = 57 / cols, 24 / rows
+    lon = -124 + (index % cols + 0.5) * dlon
+    lat = 25 + (index // cols + 0.5) * dlat
+
+    clay = rng.uniform(5, 55, n_counties)
+    return pd.DataFrame({
+        'FIPS': fips,
+        'lon': lon,
+        'lat': lat,
+        'cell_lon': dlon,
+        'cell_lat': dlat,
+        'mukey': rng.integers(100_000, 3_500_000, n_counties).astype(np.float64),
+        'ph': np.clip(rng.normal(6.4, 0.8, n_counties), 4, 9),
+        'om': rng.lognormal(0.5, 0.6, n_counties),
+        'clay': clay,
+        'sand': rng.uniform(0, 1, n_counties) * (95 - clay),
+        'aws': np.clip(rng.normal(0.16, 0.04, n_counties), 0.02, None),
+        'db': rng.normal(1.4, 0.12, n_counties)
+    })
+
+def synthetic_merged(n_counties=3000, n_months=60, seed=0, start_year=2020, missing=0.01):
+    """Monthly merged table shaped like TotalMerged.csv, plus the yield table's Yield and GS_* columns
+
+    Climate follows latitude and season with county-level noise; GS_* are April-September
+    aggregates of each county-year and Yield responds to them and to soil pH, so the
+    optimal-conditions stage sees real correlations. A fraction `missing` of rows has no
+    temperature data. FIPS are zero-padded strings.
+    """
+
+    counties = synthetic_counties(n_counties, seed)
+    rng = np.random.default_rng([seed, 2])
+    n_years = -(-n_months // 12)
+
+    # Full (county, year, month) cube first so every county-year has a growing season
+    lat = counties['lat'].to_numpy()[:, None, None]
+    month = np.arange(1, 13)[None, None, :]
+    seasonal = -np.cos(2 * np.pi * (month - 1) / 12)
+    annual_mean = 22 - 0.55 * (lat - 25)
+    amplitude = 7 + 0.35 * (lat - 25)
+    shape = (n_counties, n_years, 12)
+    tmean = annual_mean + amplitude * seasonal + rng.normal(0, 1.5, shape)
+    diurnal = rng.uniform(4, 8, (n_counties, 1, 1))
+    tmin = tmean - diurnal + rng.normal(0, 0.5, shape)
+    tmax = tmean + diurnal + rng.normal(0, 0.5, shape)
+    wetness = rng.uniform(20, 130, (n_counties, 1, 1))
+    ppt = rng.gamma(2.0, wetness / 2 * (1 + 0.3 * seasonal), shape)
+
+    season = slice(GS_MONTHS.start - 1, GS_MONTHS.stop - 1)
+    gs_ppt = ppt[:, :, season].sum(axis=2)
+    gs_tmean = tmean[:, :, season].mean(axis=2)
+    gs_tmin = tmin[:, :, season].mean(axis=2)
+    gs_tmax = tmax[:, :, season].mean(axis=2)
+    ph = counties['ph'].to_numpy()[:, None]
+    crop_yield = (175 - 0.8 * (gs_tmean - 21) ** 2 - 0.0002 * (gs_ppt - 600) ** 2
+                  - 6 * np.abs(ph - 6.5) + rng.normal(0, 15, gs_ppt.shape))
+    crop_yield = np.clip(crop_yield, 20, None).round(1)
+
+    def monthly(cube):
+        return cube.reshape(n_counties, -1)[:, :n_months].ravel()
+
+    def yearly(table):
+        return np.repeat(table, 12, axis=1)[:, :n_months].ravel()
+
+    months = np.arange(n_months)
+    county_index = np.repeat(np.arange(n_counties), n_months)
+    df = pd.DataFrame({
+        'FIPS': counties['FIPS'].to_numpy()[county_index],
+        'Year': np.tile(start_year + months // 12, n_counties),
+        'Month': np.tile(months % 12 + 1, n_counties),
+        'ppt': monthly(ppt),
+        'tmin': monthly(tmin),
+        'tmean': monthly(tmean),
+        'tmax': monthly(tmax)
+    })
+    for name in ['mukey', 'ph', 'om', 'clay', 'sand', 'aws', 'db']:
+        df[name] = counties[name].to_numpy()[county_index]
+    df['Yield'] = yearly(crop_yield)
+    df['GS_ppt_total'] = yearly(gs_ppt)
+    df['GS_tmean_avg'] = yearly(gs_tmean)
+    df['GS_tmin_avg'] = yearly(gs_tmin)
+    df['GS_tmax_avg'] = yearly(gs_tmax)
+
+    no_data = rng.random(len(df)) < missing
+    df.loc[no_data, ['tmin', 'tmean', 'tmax']] = np.nan
+    return df[MERGED_COLUMNS]
+
+def synthetic_geometry(counties):
+    """County GeoJSON with one grid cell per synthetic county"""
+
+    features = []
+    for row in counties.itertuples(index=False):
+        west, east = row.lon - row.cell_lon / 2, row.lon + row.cell_lon / 2
+        south, north = row.lat - row.cell_lat / 2, row.lat + row.cell_lat / 2
+        ring = [[west, south], [east, south], [east, north], [west, north], [west, south]]
+        features.append({'type': 'Feature', 'id': row.FIPS, 'properties': {},
+                         'geometry': {'type': 'Polygon', 'coordinates': [ring]}})
+    return {'type': 'FeatureCollection', 'features': features}
+
+def measure(fn, repeat=3, memory=True):
+    """Wall and CPU seconds of `repeat` calls, then one more call under tracemalloc for peak memory
+
+    Returns (stats dict, result of the first call).
+    """
+
+    wall, cpu = [], []
+    result = None
+    for i in range(repeat):
+        gc.collect()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        value = fn()
+        wall.append(time.perf_counter() - wall_start)
+        cpu.append(time.process_time() - cpu_start)
+        if i == 0:
+            result = value
+        del value
+
+    stats = {
+        'wall_s': [round(t, 6) for t in wall],
+        'best_s': round(min(wall), 6),
+        'median_s': round(float(np.median(wall)), 6),
+        'cpu_s': round(min(cpu), 6)
+    }
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fn()
+            stats['peak_alloc_mb'] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 3)
+        finally:
+            tracemalloc.stop()
+    stats['max_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return stats, result
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__
+    }
+
+def _stage_functions(state, map_months, reference_rows):
+    """name -> (rows processed, zero-argument callable); later stages read what earlier ones left in state"""
+
+    def load_csv():
+        return pd.read_csv(INPUT_CSV, dtype={'FIPS': str})
+
+    def build_cache():
+        from .input_cache import build_cache
+        return build_cache(INPUT_CSV)
+
+    def load_cached():
+        from .input_cache import load_merged
+        state['df'] = load_merged(INPUT_CSV, padded_fips=True)
+        return state['df']
+
+    def classify():
+        from .classify import classify_suitability_batch
+        return classify_suitability_batch(state['df'])
+
+    def classify_reference():
+        from .classify import classify_suitability
+        return state['df'].head(reference_rows).apply(classify_suitability, axis=1)
+
+    def load_cube():
+        from .cube import load_cube
+        state['cube'] = load_cube(INPUT_CSV)
+        return state['cube']
+
+    def classify_cube():
+        from .cube import classify_cube, load_cube
+        if 'cube' not in state:
+            state['cube'] = load_cube(INPUT_CSV)
+        return classify_cube(state['cube'])
+
+    def partition():
+        from .classify import partition_by_month
+        return partition_by_month(state['labelled'])
+
+    def aggregate():
+        from .classify import summarize_months
+        return summarize_months(state['classified'])
+
+    def write_csvs():
+        os.makedirs(DATA_DIR, exist_ok=True)
+        for (year, month), rows in state['month_slices'].items():
+            state['classified'].iloc[rows].to_csv(month_csv_path(year, month), index=False)
+
+    def result_store():
+        from .result_store import build_result_matrices, write_result_store
+        write_result_store(RESULT_STORE_PATH, build_result_matrices(state['classified']))
+
+    def map_html():
+        from .maps import render_month_map
+        os.makedirs(MAPS_DIR, exist_ok=True)
+        for year, month in state['map_keys']:
+            render_month_map(state['classified'].iloc[state['month_slices'][(year, month)]], year,
+                             month_name(year, month), month_map_path(year, month, 'monthly'),
+                             state['geometry'])
+
+    def png_raster():
+        from .static_maps import build_county_raster
+        return build_county_raster(state['geometry'])
+
+    def map_png():
+        from .classify import SUITABILITY_CLASSES, CLASS_COLORS
+        from .static_maps import make_palette, save_county_png
+        os.makedirs(PNG_DIR, exist_ok=True)
+        palette = make_palette([CLASS_COLORS[name] for name in SUITABILITY_CLASSES])
+        for year, month in state['map_keys']:
+            df_month = state['classified'].iloc[state['month_slices'][(year, month)]]
+            save_county_png(state['raster'], df_month['FIPS'].to_numpy(dtype='U5'),
+                            df_month['Suitability_Code'].to_numpy(), palette,
+                            month_map_path(year, month, 'png'),
+                            f'Land Suitability - {month_name(year, month)} {year}', SUITABILITY_CLASSES)
+
+    def summary():
+        from .summary import write_summary_outputs, write_index_html
+        os.makedirs(SUMMARY_DIR, exist_ok=True)
+        write_index_html(write_summary_outputs(state['stats'].copy()), 'monthly')
+
+    def optimal_tables():
+        from .optimal import optimal_analysis, write_optimal_tables
+        state['analysis'] = optimal_analysis(state['yearly'])
+        return write_optimal_tables(state['yearly'], state['analysis'])
+
+    def optimal_figures():
+        from .optimal import write_optimal_figures
+        if 'analysis' not in state:
+            from .optimal import optimal_analysis
+            state['analysis'] = optimal_analysis(state['yearly'])
+        os.makedirs(OPTIMAL_DIR, exist_ok=True)
+        write_optimal_figures(state['yearly'], state['analysis'])
+
+    rows = state['rows']
+    return {
+        'load_csv': (rows, load_csv),
+        'build_cache': (rows, build_cache),
+        'load_cached': (rows, load_cached),
+        'classify': (rows, classify),
+        'classify_reference': (min(reference_rows, rows), classify_reference),
+        'load_cube': (rows, load_cube),
+        'classify_cube': (rows, classify_cube),
+        'partition': (rows, partition),
+        'aggregate': (rows, aggregate),
+        'write_csvs': (rows, write_csvs),
+        'result_store': (rows, result_store),
+        'map_html': (len(state['map_keys']), map_html),
+        'png_raster': (state['counties'], png_raster),
+        'map_png': (len(state['map_keys']), map_png),
+        'summary': (state['months'], summary),
+        'optimal_tables': (len(state['yearly']), optimal_tables),
+        'optimal_figures': (len(state['yearly']), optimal_figures)
+    }
+
+def run_benchmark(n_counties=3000, n_months=60, seed=0, repeat=3, stages=None, map_months=3,
+                  reference_rows=20_000, memory=True, label=None, output=None, keep=False):
+    """Run the selected stages on synthetic data and write the results JSON; returns (results, path)
+
+    Stages run in a scratch directory (the repository's relative input and output paths
+    resolve there), so real outputs are never touched. Stages whose optional dependency
+    is missing are recorded as skipped.
+    """
+
+    stages = stages or STAGES
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        raise ValueError(f"Unknown stages: {', '.join(sorted(unknown))}")
+    if n_months < 36 and {'optimal_tables', 'optimal_figures'} & set(stages):
+        # TABLE2/TABLE4 rank counties with at least 3 years of yields
+        raise ValueError("The optimal-conditions stages need at least 36 months (3 yield years)")
+
+    commit = git_commit()
+    label = label or commit or 'run'
+    created = datetime.now()
+    output = os.path.abspath(output or os.path.join(
+        BENCHMARK_DIR, f"{created:%Y%m%d-%H%M%S}_{label}_{n_counties}x{n_months}.json"))
+
+    print(f"Generating {n_counties} counties x {n_months} months of synthetic data...")
+    start = time.perf_counter()
+    df = synthetic_merged(n_counties, n_months, seed)
+    generate_s = time.perf_counter() - start
+
+    results = {
+        'version': RESULT_VERSION,
+        'label': label,
+        'created': created.isoformat(timespec='seconds'),
+        'git_commit': commit,
+        'params': {'counties': n_counties, 'months': n_months, 'rows': len(df), 'seed': seed,
+                   'repeat': repeat, 'map_months': map_months, 'reference_rows': reference_rows},
+        'environment': environment(),
+        'generate_s': round(generate_s, 3),
+        'stages': {}
+    }
+
+    workdir = tempfile.mkdtemp(prefix='suitability-bench-')
+    cwd = os.getcwd()
+    try:
+        os.chdir(workdir)
+        os.makedirs(os.path.dirname(INPUT_CSV), exist_ok=True)
+        df.to_csv(INPUT_CSV, index=False)
+
+        # Inputs of every stage are prepared up front, so any subset of stages can run
+        from .classify import classify_suitability_batch, partition_by_month, summarize_months
+        labelled = df.copy()
+        labelled[['Suitability_Class', 'Suitability_Code', 'Suitability_Score']] = \
+            classify_suitability_batch(labelled)
+        classified, month_slices = partition_by_month(labelled)
+        state = {
+            'df': df,
+            'labelled': labelled,
+            'classified': classified,
+            'month_slices': month_slices,
+            'map_keys': list(month_slices)[:map_months],
+            'stats': summarize_months(classified),
+            'yearly': df.drop_duplicates(['FIPS', 'Year']).drop(columns='Month').reset_index(drop=True),
+            'rows': len(df),
+            'counties': n_counties,
+            'months': len(month_slices)
+        }
+        if {'map_html', 'map_png', 'png_raster'} & set(stages):
+            state['geometry'] = synthetic_geometry(synthetic_counties(n_counties, seed))
+        if 'map_png' in stages:
+            from .static_maps import build_county_raster
+            state['raster'] = build_county_raster(state['geometry'])
+
+        functions = _stage_functions(state, map_months, reference_rows)
+        for name in stages:
+            rows, fn = functions[name]
+            try:
+                stats, _ = measure(fn, repeat, memory)
+            except ImportError as error:
+                results['stages'][name] = {'skipped': str(error)}
+                print(f"  {name:<20} skipped ({error})")
+                continue
+            stats['rows'] = rows
+            stats['rows_per_s'] = round(rows / stats['best_s']) if stats['best_s'] > 0 else None
+            results['stages'][name] = stats
+            memory_note = f", peak {stats['peak_alloc_mb']:.1f} MB" if memory else ''
+            print(f"  {name:<20} {stats['best_s']:9.4f} s best of {repeat}{memory_note}")
+    finally:
+        os.chdir(cwd)
+        if keep:
+            print(f"Kept scratch directory {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=1)
+    return results, output
+
+def load_results(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def compare_results(baseline, current, threshold=0.10):
+    """Per-stage comparison rows of two results dicts, flagging changes beyond threshold
+
+    A stage regresses if its best time or peak memory grew by more than threshold (relative)
+    and by more than the noise floors MIN_TIME_DELTA / MIN_MEMORY_DELTA_MB.
+    """
+
+    rows = []
+    for name in [stage for stage in current['stages'] if stage in baseline['stages']]:
+        old, new = baseline['stages'][name], current['stages'][name]
+        if 'skipped' in old or 'skipped' in new:
+            continue
+        time_ratio = new['best_s'] / old['best_s'] if old['best_s'] > 0 else float('inf')
+        status = []
+        if time_ratio > 1 + threshold and new['best_s'] - old['best_s'] > MIN_TIME_DELTA:
+            status.append('slower')
+        elif time_ratio < 1 - threshold and old['best_s'] - new['best_s'] > MIN_TIME_DELTA:
+            status.append('faster')
+
+        memory_ratio = None
+        if 'peak_alloc_mb' in old and 'peak_alloc_mb' in new:
+            old_mb, new_mb = old['peak_alloc_mb'], new['peak_alloc_mb']
+            memory_ratio = new_mb / old_mb if old_mb > 0 else None
+            if new_mb > old_mb * (1 + threshold) and new_mb - old_mb > MIN_MEMORY_DELTA_MB:
+                status.append('more memory')
+            elif new_mb < old_mb * (1 - threshold) and old_mb - new_mb > MIN_MEMORY_DELTA_MB:
+                status.append('less memory')
+
+        rows.append({'stage': name, 'baseline_s': old['best_s'], 'current_s': new['best_s'],
+                     'time_ratio': time_ratio, 'baseline_mb': old.get('peak_alloc_mb'),
+                     'current_mb': new.get('peak_alloc_mb'), 'memory_ratio': memory_ratio,
+                     'status': status,
+                     'regression': 'slower' in status or 'more memory' in status})
+    return rows
+
+def print_comparison(baseline, current, rows):
+    print(f"Baseline: {baseline['label']} ({baseline['created']})   Current: {current['label']} ({current['created']})")
+    sizes = [{key: results['params'][key] for key in ('counties', 'months', 'rows', 'seed')}
+             for results in (baseline, current)]
+    if sizes[0] != sizes[1]:
+        print(f"Warning: synthetic data differs: {sizes[0]} vs {sizes[1]}")
+    print(f"{'stage':<20} {'baseline s':>11} {'current s':>11} {'ratio':>7} {'base MB':>9} {'curr MB':>9}  status")
+    for row in rows:
+        base_mb = '' if row['baseline_mb'] is None else f"{row['baseline_mb']:.1f}"
+        curr_mb = '' if row['current_mb'] is None else f"{row['current_mb']:.1f}"
+        print(f"{row['stage']:<20} {row['baseline_s']:11.4f} {row['current_s']:11.4f} {row['time_ratio']:7.2f} "
+              f"{base_mb:>9} {curr_mb:>9}  {', '.join(row['status'])}")
@@ -0,0 +1,83 @@
+"""Batched bootstrap of the top-10% yield quartiles and parameter-yield correlations"""
+
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+BOOTSTRAP_BATCH = 250
+
+def weighted_quantiles(sorted_values, counts, quantiles):
+    """Linear-interpolated quantiles (as Series.quantile) of each resample
+    
+    counts[b, i] is how often sorted_values[i] was drawn into resample b, so the value at
+    position k of the sorted resample is the first one whose cumulative count exceeds k.
+    """
+    cumulative = np.cumsum(counts, axis=1, dtype=np.int32)
+    last = len(sorted_values) - 1
+    result = np.empty((len(counts), len(quantiles)))
+    for j, q in enumerate(quantiles):
+        position = q * (cumulative[:, -1] - 1)
+        below = np.floor(position)
+        lower = sorted_values[np.minimum((cumulative <= below[:, None]).sum(axis=1), last)]
+        upper = sorted_values[np.minimum((cumulative <= below[:, None] + 1).sum(axis=1), last)]
+        result[:, j] = lower + (position - below) * (upper - lower)
+    return result
+
+def bootstrap_batch(values, yields, seed, n_resamples):
+    """Top-10% quartiles (resamples, params, 3) and yield correlations (resamples, params)
+    
+    Each resample is a row of indices drawn with replacement, turned into per-row counts.
+    Correlations then come from matrix products of the counts with the centred columns,
+    and quantiles from cumulative counts over rows sorted once per parameter.
+    """
+    n_rows, n_params = values.shape
+    rng = np.random.default_rng(seed)
+    draws = rng.integers(0, n_rows, size=(n_resamples, n_rows))
+    draws += np.arange(n_resamples)[:, None] * n_rows
+    counts = np.bincount(draws.ravel(), minlength=n_resamples * n_rows).reshape(n_resamples, n_rows)
+    weights = counts / n_rows
+    counts = counts.astype(np.int16)
+
+    x = values - values.mean(axis=0)
+    y = yields - yields.mean()
+    mean_x, mean_y = weights @ x, weights @ y
+    cov = weights @ (x * y[:, None]) - mean_x * mean_y[:, None]
+    var_x = weights @ (x * x) - mean_x ** 2
+    var_y = weights @ (y * y) - mean_y ** 2
+    correlations = cov / np.sqrt(var_x * var_y[:, None])
+
+    order = np.argsort(yields, kind='stable')
+    threshold = weighted_quantiles(yields[order], counts[:, order], [0.90])[:, 0]
+    # Rows below every resample's threshold never reach a top 10%, so drop them up front
+    candidates = yields >= threshold.min()
+    top_values = values[candidates]
+    top_counts = counts[:, candidates] * (yields[candidates] >= threshold[:, None])
+
+    quartiles = np.empty((n_resamples, n_params, 3))
+    for p in range(n_params):
+        order = np.argsort(top_values[:, p], kind='stable')
+        quartiles[:, p] = weighted_quantiles(top_values[order, p], top_counts[:, order], [0.25, 0.50, 0.75])
+    return quartiles, correlations
+
+def run_bootstrap(values, yields, n_resamples, seed=0, workers=1):
+    """Stack bootstrap_batch results over n_resamples, split into independently seeded batches
+    
+    The batches and their seeds do not depend on workers, so results are reproducible.
+    """
+    sizes = [BOOTSTRAP_BATCH] * (n_resamples // BOOTSTRAP_BATCH)
+    if n_resamples % BOOTSTRAP_BATCH:
+        sizes.append(n_resamples % BOOTSTRAP_BATCH)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = ([values] * len(sizes), [yields] * len(sizes), seeds, sizes)
+
+    if workers > 1 and 'fork' not in multiprocessing.get_all_start_methods():
+        print("--workers needs the 'fork' start method; bootstrapping serially")
+        workers = 1
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=multiprocessing.get_context('fork')) as pool:
+            batches = list(pool.map(bootstrap_batch, *jobs))
+    else:
+        batches = list(map(bootstrap_batch, *jobs))
+    return (np.concatenate([q for q, _ in batches]),
+            np.concatenate([c for _, c in batches]))
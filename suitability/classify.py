@@ -0,0 +1,426 @@
+"""Monthly suitability scoring: the reference row classifier, the declarative criteria
+table and its vectorized evaluation, and per-month summaries"""
+
+import pandas as pd
+import numpy as np
+from datetime import datetime
+
+def classify_suitability(row):
+    """Monthly suitability classification using Mainland USA criteria"""
+    
+    temp_missing = (pd.isna(row['tmean']) and pd.isna(row['tmin']) and pd.isna(row['tmax']))
+    temp_all_zero = (row['tmean'] == 0 and row['tmin'] == 0 and row['tmax'] == 0)
+    
+    if temp_missing or temp_all_zero:
+        return 'No Data', 5, 0
+    
+    if pd.isna(row['ppt']):
+        return 'No Data', 5, 0
+    
+    score = 0
+    max_score = 0
+    
+    # Monthly Precipitation (mm/month)
+    max_score += 3
+    ppt = row['ppt']
+    if 100 <= ppt <= 160:
+        score += 3
+    elif 75 <= ppt < 100:
+        score += 2
+    elif 40 <= ppt < 75:
+        score += 1
+    
+    # Monthly Minimum Temperature (C)
+    max_score += 3
+    if 16 <= row['tmin'] <= 18:
+        score += 3
+    elif 14 <= row['tmin'] < 16:
+        score += 2
+    elif 12 <= row['tmin'] < 14:
+        score += 1
+    
+    # Monthly Maximum Temperature (C)
+    max_score += 3
+    if 24 <= row['tmax'] <= 28:
+        score += 3
+    elif 28 < row['tmax'] <= 32:
+        score += 2
+    elif 32 < row['tmax'] <= 36:
+        score += 1
+    
+    # Monthly Mean Temperature (C)
+    max_score += 3
+    tmean = row['tmean']
+    if 22 <= tmean <= 26:
+        score += 3
+    elif (18 <= tmean < 22) or (26 < tmean <= 32):
+        score += 2
+    elif (14 <= tmean < 18) or (32 < tmean <= 35):
+        score += 1
+    
+    # pH
+    max_score += 3
+    if 5.5 <= row['ph'] <= 7.3:
+        score += 3
+    elif (5.0 <= row['ph'] < 5.5) or (7.3 < row['ph'] <= 8.0):
+        score += 2
+    elif (4.5 <= row['ph'] < 5.0) or (8.0 < row['ph'] <= 8.5):
+        score += 1
+    
+    # Organic Matter (%)
+    max_score += 2
+    if row['om'] > 2:
+        score += 2
+    elif 1 <= row['om'] <= 2:
+        score += 1.5
+    elif 0.5 <= row['om'] < 1:
+        score += 0.5
+    
+    # Clay Content (%)
+    max_score += 2
+    if 10 <= row['clay'] <= 35:
+        score += 2
+    elif 35 < row['clay'] <= 45:
+        score += 1.5
+    elif 45 < row['clay'] <= 60:
+        score += 0.5
+    
+    # Sand Content (%)
+    max_score += 2
+    if 30 <= row['sand'] <= 60:
+        score += 2
+    elif (20 <= row['sand'] < 30) or (60 < row['sand'] <= 70):
+        score += 1.5
+    elif (10 <= row['sand'] < 20) or (70 < row['sand'] <= 80):
+        score += 0.5
+    
+    # Available Water Storage (mm/m)
+    max_score += 2
+    aws_mm = row['aws'] * 1000
+    if aws_mm > 150:
+        score += 2
+    elif 100 <= aws_mm <= 150:
+        score += 1.5
+    elif 50 <= aws_mm < 100:
+        score += 0.5
+    
+    # Bulk Density (g/cm3)
+    max_score += 2
+    if row['db'] < 1.4:
+        score += 2
+    elif 1.4 <= row['db'] <= 1.6:
+        score += 1.5
+    elif 1.6 < row['db'] <= 1.7:
+        score += 0.5
+    
+    percentage = (score / max_score) * 100
+    
+    if percentage >= 75:
+        return 'Highly Suitable (S1)', 1, percentage
+    elif percentage >= 60:
+        return 'Moderately Suitable (S2)', 2, percentage
+    elif percentage >= 40:
+        return 'Marginally Suitable (S3)', 3, percentage
+    else:
+        return 'Not Suitable (N)', 4, percentage
+
+SUITABILITY_CLASSES = np.array([
+    'Highly Suitable (S1)',
+    'Moderately Suitable (S2)',
+    'Marginally Suitable (S3)',
+    'Not Suitable (N)',
+    'No Data'
+], dtype=object)
+
+CLASS_COLORS = {
+    'Highly Suitable (S1)': '#2E7D32',
+    'Moderately Suitable (S2)': '#81C784',
+    'Marginally Suitable (S3)': '#FFF176',
+    'Not Suitable (N)': '#E57373',
+    'No Data': '#CCCCCC'
+}
+
+# Declarative form of classify_suitability: one row per value range of a scoring level.
+# Within a criterion the levels (distinct points) are tried in listed order and the first
+# match scores, like the if/elif ladders; a level covering two ranges has two rows.
+CRITERIA_COLUMNS = ['criterion', 'column', 'scale', 'max_points', 'points',
+                    'low', 'low_closed', 'high', 'high_closed']
+
+DEFAULT_CRITERIA = pd.DataFrame([
+    # Monthly Precipitation (mm/month)
+    ('ppt', 'ppt', 1, 3, 3, 100, True, 160, True),
+    ('ppt', 'ppt', 1, 3, 2, 75, True, 100, False),
+    ('ppt', 'ppt', 1, 3, 1, 40, True, 75, False),
+    # Monthly Minimum Temperature (C)
+    ('tmin', 'tmin', 1, 3, 3, 16, True, 18, True),
+    ('tmin', 'tmin', 1, 3, 2, 14, True, 16, False),
+    ('tmin', 'tmin', 1, 3, 1, 12, True, 14, False),
+    # Monthly Maximum Temperature (C)
+    ('tmax', 'tmax', 1, 3, 3, 24, True, 28, True),
+    ('tmax', 'tmax', 1, 3, 2, 28, False, 32, True),
+    ('tmax', 'tmax', 1, 3, 1, 32, False, 36, True),
+    # Monthly Mean Temperature (C)
+    ('tmean', 'tmean', 1, 3, 3, 22, True, 26, True),
+    ('tmean', 'tmean', 1, 3, 2, 18, True, 22, False),
+    ('tmean', 'tmean', 1, 3, 2, 26, False, 32, True),
+    ('tmean', 'tmean', 1, 3, 1, 14, True, 18, False),
+    ('tmean', 'tmean', 1, 3, 1, 32, False, 35, True),
+    # pH
+    ('ph', 'ph', 1, 3, 3, 5.5, True, 7.3, True),
+    ('ph', 'ph', 1, 3, 2, 5.0, True, 5.5, False),
+    ('ph', 'ph', 1, 3, 2, 7.3, False, 8.0, True),
+    ('ph', 'ph', 1, 3, 1, 4.5, True, 5.0, False),
+    ('ph', 'ph', 1, 3, 1, 8.0, False, 8.5, True),
+    # Organic Matter (%)
+    ('om', 'om', 1, 2, 2, 2, False, np.inf, True),
+    ('om', 'om', 1, 2, 1.5, 1, True, 2, True),
+    ('om', 'om', 1, 2, 0.5, 0.5, True, 1, False),
+    # Clay Content (%)
+    ('clay', 'clay', 1, 2, 2, 10, True, 35, True),
+    ('clay', 'clay', 1, 2, 1.5, 35, False, 45, True),
+    ('clay', 'clay', 1, 2, 0.5, 45, False, 60, True),
+    # Sand Content (%)
+    ('sand', 'sand', 1, 2, 2, 30, True, 60, True),
+    ('sand', 'sand', 1, 2, 1.5, 20, True, 30, False),
+    ('sand', 'sand', 1, 2, 1.5, 60, False, 70, True),
+    ('sand', 'sand', 1, 2, 0.5, 10, True, 20, False),
+    ('sand', 'sand', 1, 2, 0.5, 70, False, 80, True),
+    # Available Water Storage (mm/m)
+    ('aws', 'aws', 1000, 2, 2, 150, False, np.inf, True),
+    ('aws', 'aws', 1000, 2, 1.5, 100, True, 150, True),
+    ('aws', 'aws', 1000, 2, 0.5, 50, True, 100, False),
+    # Bulk Density (g/cm3)
+    ('db', 'db', 1, 2, 2, -np.inf, True, 1.4, False),
+    ('db', 'db', 1, 2, 1.5, 1.4, True, 1.6, True),
+    ('db', 'db', 1, 2, 0.5, 1.6, False, 1.7, True),
+], columns=CRITERIA_COLUMNS)
+
+# Minimum percentage for S1, S2 and S3
+DEFAULT_CLASS_CUTOFFS = (75, 60, 40)
+
+# Static per county/mukey; criteria on these columns are scored once per soil profile
+SOIL_COLUMNS = ['ph', 'om', 'clay', 'sand', 'aws', 'db']
+
+def compile_criteria(tables):
+    """Pack K criteria tables into padded (scenario, criterion, level, range) arrays"""
+    
+    criteria = list(dict.fromkeys(name for table in tables for name in table['criterion']))
+    columns = list(dict.fromkeys(name for table in tables for name in table['column']))
+    
+    parsed = []
+    for table in tables:
+        by_criterion = {}
+        for name, rows in table.groupby('criterion', sort=False):
+            levels = {}
+            for row in rows.itertuples(index=False):
+                levels.setdefault(row.points, []).append(row)
+            by_criterion[name] = (rows.iloc[0], levels)
+        parsed.append(by_criterion)
+    
+    n_levels = max(len(levels) for p in parsed for _, levels in p.values())
+    n_ranges = max(len(ranges) for p in parsed for _, levels in p.values() for ranges in levels.values())
+    shape = (len(tables), len(criteria), n_levels, n_ranges)
+    
+    compiled = {
+        'criteria': criteria,
+        'columns': columns,
+        'column_index': np.zeros(shape[:2], dtype=np.intp),
+        'scale': np.ones(shape[:2]),
+        'max_points': np.zeros(shape[:2]),
+        'points': np.zeros(shape[:3]),
+        # Padding ranges are empty (low=+inf, high=-inf) and never match
+        'low': np.full(shape, np.inf),
+        'low_closed': np.zeros(shape, dtype=bool),
+        'high': np.full(shape, -np.inf),
+        'high_closed': np.zeros(shape, dtype=bool)
+    }
+    
+    for k, by_criterion in enumerate(parsed):
+        for c, name in enumerate(criteria):
+            if name not in by_criterion:
+                continue
+            first, levels = by_criterion[name]
+            compiled['column_index'][k, c] = columns.index(first['column'])
+            compiled['scale'][k, c] = first['scale']
+            compiled['max_points'][k, c] = first['max_points']
+            for l, (points, ranges) in enumerate(levels.items()):
+                compiled['points'][k, c, l] = points
+                for r, row in enumerate(ranges):
+                    compiled['low'][k, c, l, r] = row.low
+                    compiled['low_closed'][k, c, l, r] = row.low_closed
+                    compiled['high'][k, c, l, r] = row.high
+                    compiled['high_closed'][k, c, l, r] = row.high_closed
+    
+    return compiled
+
+def subset_criteria(compiled, selected):
+    """Compiled arrays restricted to the criteria in the boolean mask `selected`"""
+    
+    column_index = compiled['column_index'][:, selected]
+    used = np.unique(column_index)
+    subset = {key: value[:, selected] for key, value in compiled.items()
+              if isinstance(value, np.ndarray)}
+    subset['criteria'] = [name for name, keep in zip(compiled['criteria'], selected) if keep]
+    subset['columns'] = [compiled['columns'][i] for i in used]
+    subset['column_index'] = np.searchsorted(used, column_index)
+    return subset
+
+def column_values(data, compiled):
+    """(columns, rows) float64 matrix of the inputs a compiled table reads"""
+    
+    if not compiled['columns']:
+        return np.zeros((0, len(data)))
+    return np.stack([data[name].to_numpy(dtype=np.float64) for name in compiled['columns']])
+
+def criteria_points(values, compiled):
+    """Per-criterion points, shape (K, criteria, rows), for a block of column values"""
+    
+    n_scenarios, n_criteria, n_levels, _ = compiled['low'].shape
+    if n_criteria == 0:
+        return np.zeros((n_scenarios, 0, values.shape[1]))
+    
+    x = values[compiled['column_index']]
+    x = (x * compiled['scale'][..., None])[:, :, None, None, :]
+    low, high = compiled['low'][..., None], compiled['high'][..., None]
+    low_closed, high_closed = compiled['low_closed'][..., None], compiled['high_closed'][..., None]
+    
+    # NaN fails every comparison, so missing values score 0 like the scalar ladders
+    in_range = (np.where(low_closed, x >= low, x > low) &
+                np.where(high_closed, x <= high, x < high))
+    level_match = in_range.any(axis=3)
+    
+    # First matching level wins: apply levels last-to-first
+    points = np.zeros((n_scenarios, n_criteria, values.shape[1]))
+    for l in reversed(range(n_levels)):
+        points = np.where(level_match[:, :, l], compiled['points'][:, :, l, None], points)
+    return points
+
+def soil_score_table(data, compiled):
+    """Score the static soil criteria once per distinct FIPS/mukey soil profile
+    
+    Returns the profile id of every row and the (K, soil criteria, profiles) points.
+    """
+    
+    keys = [name for name in ('FIPS', 'mukey') if name in data.columns] + compiled['columns']
+    profile_id = data.groupby(keys, sort=False, dropna=False).ngroup().to_numpy()
+    first_rows = np.unique(profile_id, return_index=True)[1]
+    profiles = data.iloc[first_rows]
+    return profile_id, criteria_points(column_values(profiles, compiled), compiled)
+
+def no_data_mask(data):
+    """Rows classify_suitability reports as No Data (missing/all-zero temperatures, missing ppt)"""
+    
+    tmin, tmax, tmean = (data[name].to_numpy(dtype=np.float64) for name in ('tmin', 'tmax', 'tmean'))
+    temp_missing = np.isnan(tmean) & np.isnan(tmin) & np.isnan(tmax)
+    temp_all_zero = (tmean == 0) & (tmin == 0) & (tmax == 0)
+    return temp_missing | temp_all_zero | np.isnan(data['ppt'].to_numpy(dtype=np.float64))
+
+def classify_scenarios(data, tables, cutoffs, chunk_rows=None):
+    """Score K criteria tables over all rows in one pass; returns (K, rows) codes and scores"""
+    
+    compiled = compile_criteria(tables)
+    n_scenarios, n_criteria, n_levels, n_ranges = compiled['low'].shape
+    n_rows = len(data)
+    
+    # Soil criteria are scored per soil profile up front; only climate criteria run per row
+    is_soil = np.array([all(compiled['columns'][i] in SOIL_COLUMNS for i in compiled['column_index'][:, c])
+                        for c in range(n_criteria)], dtype=bool)
+    climate = subset_criteria(compiled, ~is_soil)
+    soil = subset_criteria(compiled, is_soil)
+    profile_id, soil_points = soil_score_table(data, soil)
+    climate_values = column_values(data, climate)
+    climate_slot, soil_slot = np.cumsum(~is_soil) - 1, np.cumsum(is_soil) - 1
+    
+    # Bound the (K, C, L, R, rows) comparison temporaries to ~16M elements per chunk
+    if chunk_rows is None:
+        chunk_rows = max(1024, (1 << 24) // (n_scenarios * max(n_criteria, 1) * n_levels * n_ranges))
+    
+    score = np.zeros((n_scenarios, n_rows))
+    for start in range(0, n_rows, chunk_rows):
+        stop = min(start + chunk_rows, n_rows)
+        climate_chunk = criteria_points(climate_values[:, start:stop], climate)
+        soil_chunk = soil_points[:, :, profile_id[start:stop]]
+        
+        # Add criteria in table order, as the scalar ladder accumulates them
+        for c in range(n_criteria):
+            if is_soil[c]:
+                score[:, start:stop] += soil_chunk[:, soil_slot[c]]
+            else:
+                score[:, start:stop] += climate_chunk[:, climate_slot[c]]
+    
+    max_score = compiled['max_points'].sum(axis=1)
+    percentage = (score / max_score[:, None]) * 100
+    
+    cutoffs = np.asarray(cutoffs, dtype=np.float64)
+    code = np.where(percentage >= cutoffs[:, 0, None], 1,
+                    np.where(percentage >= cutoffs[:, 1, None], 2,
+                             np.where(percentage >= cutoffs[:, 2, None], 3, 4)))
+    no_data = no_data_mask(data)
+    code = np.where(no_data, 5, code).astype(np.uint8)
+    percentage = np.where(no_data, 0.0, percentage)
+    return code, percentage
+
+def classify_suitability_batch(data, criteria=DEFAULT_CRITERIA, cutoffs=DEFAULT_CLASS_CUTOFFS):
+    """Vectorized classify_suitability over a whole DataFrame (same criteria, same results)"""
+    
+    code, percentage = classify_scenarios(data, [criteria], [cutoffs])
+    code = code[0].astype(np.int64)
+    
+    return pd.DataFrame({
+        'Suitability_Class': SUITABILITY_CLASSES[code - 1],
+        'Suitability_Code': code,
+        'Suitability_Score': percentage[0]
+    }, index=data.index)
+
+def partition_by_month(data):
+    """Sort once by Year/Month; return the sorted frame and its (year, month) -> row slice map"""
+    
+    data = data.sort_values(['Year', 'Month'], kind='stable', ignore_index=True)
+    if len(data) == 0:
+        return data, {}
+    
+    years_arr = data['Year'].to_numpy()
+    months_arr = data['Month'].to_numpy()
+    boundary = (years_arr[1:] != years_arr[:-1]) | (months_arr[1:] != months_arr[:-1])
+    starts = np.flatnonzero(np.r_[True, boundary])
+    stops = np.r_[starts[1:], len(data)]
+    
+    return data, {(int(years_arr[start]), int(months_arr[start])): slice(start, stop)
+                  for start, stop in zip(starts, stops)}
+
+COUNT_COLUMNS = ['S1_Count', 'S2_Count', 'S3_Count', 'N_Count', 'NoData_Count']
+
+def month_partials(data):
+    """Per-month class counts and score sums; partials of disjoint row sets can be added"""
+    
+    codes = data['Suitability_Code']
+    flags = {name: codes.eq(code) for code, name in enumerate(COUNT_COLUMNS, start=1)}
+    return data.assign(**flags).groupby(['Year', 'Month'], sort=True).agg(
+        Total_Counties=('Suitability_Code', 'size'),
+        **{name: (name, 'sum') for name in COUNT_COLUMNS},
+        Score_Sum=('Suitability_Score', 'sum')
+    )
+
+def add_month_partials(total, partial):
+    """Accumulate month_partials results (total may be None)"""
+    
+    if total is None:
+        return partial
+    return total.add(partial, fill_value=0)
+
+def finalize_month_stats(partials):
+    """monthly_statistics rows from accumulated partials"""
+    
+    summary = partials.sort_index().reset_index()
+    for name in ['Total_Counties'] + COUNT_COLUMNS:
+        summary[name] = summary[name].astype(np.int64)
+    summary['Avg_Score'] = summary.pop('Score_Sum') / summary['Total_Counties']
+    
+    summary.insert(2, 'Month_Name', [datetime(int(y), int(m), 1).strftime('%B')
+                                     for y, m in zip(summary['Year'], summary['Month'])])
+    return summary
+
+def summarize_months(data):
+    """Per-month class counts and average score from one grouped aggregation"""
+    
+    return finalize_month_stats(month_partials(data))
@@ -0,0 +1,459 @@
+"""Command line interface: python -m suitability <command>
+
+Each command imports only the modules it needs, so e.g. `classify` never loads plotly,
+matplotlib or scipy.
+"""
+
+import argparse
+import json
+import sys
+
+MAP_CHOICES = ['monthly', 'slider', 'png']
+MAPS_HELP = ("'monthly' writes one HTML map per month; 'slider' writes a single VIEWER.html that "
+             "loads plotly.js and county geometry once; 'png' paints one static image per month "
+             "from a cached county raster")
+
+def cmd_run(args, parser):
+    if args.stream and (args.scenarios or args.incremental or args.maps == 'slider'):
+        parser.error('--stream cannot be combined with --scenarios, --incremental or --maps slider')
+    if args.scenarios:
+        return cmd_scenarios(args, parser)
+
+    from .geometry import configure
+    from .paths import OUTPUT_DIR
+    from .pipeline import make_output_dirs, run_pipeline, run_stream
+
+    configure(args.geometry_tolerance, args.geometry_decimals)
+    make_output_dirs(args.maps)
+    if args.stream:
+        stats_df = run_stream(args.maps, args.chunk_rows, args.writer_threads)
+    else:
+        stats_df = run_pipeline(args.maps, args.workers, args.incremental, args.writer_threads)
+    if stats_df is not None:
+        print(f"Done; Generated {len(stats_df)} monthly suitability maps")
+        print(f"Outputs saved to: {OUTPUT_DIR}/")
+
+def cmd_classify(args, parser):
+    from .paths import DATA_DIR, RESULT_STORE_PATH
+    from .pipeline import make_output_dirs, run_classify
+
+    make_output_dirs(None)
+    month_slices = run_classify(args.writer_threads)
+    print(f"Done; Classified {len(month_slices)} months into {DATA_DIR}/ and {RESULT_STORE_PATH}/")
+
+def cmd_maps(args, parser):
+    from .geometry import configure
+    from .paths import OUTPUT_DIR
+    from .pipeline import make_output_dirs, run_maps
+
+    configure(args.geometry_tolerance, args.geometry_decimals)
+    make_output_dirs(args.maps)
+    month_keys = run_maps(args.maps, args.workers, args.writer_threads)
+    print(f"Done; Rendered {len(month_keys)} months ({args.maps}) in {OUTPUT_DIR}/")
+
+def cmd_summary(args, parser):
+    from .paths import SUMMARY_DIR
+    from .pipeline import make_output_dirs, run_summary
+
+    make_output_dirs(None)
+    stats_df = run_summary(args.maps, args.writer_threads)
+    print(f"Done; Summarized {len(stats_df)} months in {SUMMARY_DIR}/")
+
+def cmd_geometry(args, parser):
+    from .geometry import geometry_report, map_geometry, GEOMETRY_CACHE_DIR
+    from .pipeline import months_on_disk, read_month_csv
+    from .trace import stage
+
+    month_keys = months_on_disk()
+    df_month = read_month_csv(*month_keys[0]) if month_keys else None
+    with stage('map_geometry', tolerance=args.geometry_tolerance, decimals=args.geometry_decimals):
+        map_geometry(args.geometry_tolerance, args.geometry_decimals)
+    with stage('geometry_report'):
+        rows = geometry_report(args.geometry_tolerance, args.geometry_decimals, df_month)
+
+    columns = ['vertices', 'bytes', 'gzip_bytes'] + (['html_bytes', 'render_s'] if df_month is not None else [])
+    print(f"{'':<38}" + ''.join(f'{name:>12}' for name in columns))
+    for row in rows:
+        print(f"{row['geometry']:<38}" + ''.join(f'{row[name]:>12}' for name in columns))
+    if df_month is None:
+        print("No classified months on disk; run the classify command to also time a map")
+    print(f"Done; Simplified in {rows[1]['simplify_s']} s, cached in {GEOMETRY_CACHE_DIR}/")
+
+def cmd_cube(args, parser):
+    from .paths import OUTPUT_DIR
+    from .pipeline import make_output_dirs, run_cube
+
+    make_output_dirs(None)
+    stats_df = run_cube(args.maps)
+    print(f"Done; Summarized {len(stats_df)} months from the cube into {OUTPUT_DIR}/")
+
+def cmd_windows(args, parser):
+    try:
+        lengths = sorted({int(part) for part in args.lengths.split(',')})
+    except ValueError:
+        parser.error('--lengths must be comma-separated month counts, e.g. 4,5,6')
+    from .paths import WINDOWS_DIR
+    from .result_store import open_result_store
+    from .trace import stage
+    from .windows import write_windows
+
+    with stage('windows', lengths=','.join(map(str, lengths))):
+        summary = write_windows(open_result_store(args.store), lengths, WINDOWS_DIR, args.csv)
+    print(f"Done; {len(summary)} windows of {args.lengths} months summarized in {WINDOWS_DIR}/")
+
+def cmd_spatial(args, parser):
+    from .paths import SPATIAL_DIR
+    from .result_store import open_result_store
+    from .spatial import load_adjacency, write_spatial
+    from .trace import stage
+
+    with stage('adjacency', contiguity=args.contiguity):
+        adjacency, adjacency_fips = load_adjacency(args.geometry, args.contiguity)
+    with stage('spatial_statistics'):
+        table, pairs, isolated = write_spatial(open_result_store(args.store), adjacency, adjacency_fips,
+                                               SPATIAL_DIR)
+    print(f"{args.contiguity.capitalize()} adjacency: {pairs} neighbour pairs, {isolated} counties without neighbours")
+    print(f"Done; Moran's I for {len(table)} months in {SPATIAL_DIR}/")
+
+def cmd_scenarios(args, parser):
+    from .input_cache import load_merged
+    from .paths import INPUT_CSV, SCENARIOS_DIR
+    from .scenarios import run_scenario_sweep
+    from .trace import stage
+
+    print("Loading monthly data...")
+    with stage('load', source=INPUT_CSV) as span:
+        data = load_merged(INPUT_CSV, padded_fips=True)
+        span.set(rows=len(data))
+    run_scenario_sweep(data, args.scenarios, SCENARIOS_DIR)
+
+def parse_percentiles(text):
+    """'50:99' (step 1), '50:99:5' or '75,90,95' -> sorted unique percentiles"""
+    if ':' in text:
+        start, stop, *step = (float(part) for part in text.split(':'))
+        step = step[0] if step else 1.0
+        if len(text.split(':')) > 3 or step <= 0 or stop < start:
+            raise ValueError
+        values = [start + step * i for i in range(int((stop - start) / step + 1e-9) + 1)]
+    else:
+        values = [float(part) for part in text.split(',') if part.strip()]
+    values = sorted({round(float(value), 6) for value in values})
+    if not values or not all(0 <= value <= 100 for value in values):
+        raise ValueError
+    return values
+
+def cmd_optimal(args, parser):
+    if not 0 < args.confidence < 1:
+        parser.error('--confidence must be between 0 and 1')
+    if args.sweep:
+        try:
+            percentiles = parse_percentiles(args.sweep)
+        except ValueError:
+            parser.error('--sweep must be START:STOP[:STEP] or comma-separated percentiles in 0-100, e.g. 50:99')
+        from .optimal import run_threshold_sweep
+
+        run_threshold_sweep(percentiles)
+        return
+    from .optimal import run_optimal
+
+    run_optimal(args.bootstrap, args.confidence, args.seed, args.workers)
+
+def cmd_shard(args, parser):
+    if bool(args.states) == bool(args.shard):
+        parser.error('give exactly one of --states and --shard')
+    from .shards import parse_states, run_shard
+
+    states = shard = None
+    try:
+        if args.states:
+            states = parse_states(args.states)
+        else:
+            index, count = (int(part) for part in args.shard.split('/'))
+            if not 0 <= index < count:
+                raise ValueError
+            shard = (index, count)
+    except ValueError as error:
+        parser.error(str(error) or '--shard must look like I/N with 0 <= I < N')
+    shard_dir = run_shard(states, shard, args.output)
+    print(f"Done; Shard written to: {shard_dir}/")
+
+def cmd_merge(args, parser):
+    from .paths import OUTPUT_DIR
+    from .pipeline import make_output_dirs
+    from .shards import merge_shards
+
+    make_output_dirs(None)
+    stats_df = merge_shards(args.shards, args.maps)
+    print(f"Done; Merged {len(stats_df)} months into {OUTPUT_DIR}/")
+
+def cmd_shard_check(args, parser):
+    from .paths import INPUT_CSV
+    from .shards import verify_merge
+
+    counts = sorted({int(part) for part in args.shards.split(',') if part.strip().isdigit()})
+    if not counts or counts[0] < 1:
+        parser.error('--shards must be comma-separated shard counts of at least 1, e.g. 1,3')
+    mismatches = verify_merge(counts, args.csv or INPUT_CSV)
+    for count, paths in mismatches.items():
+        print(f"{count} shard(s): " + (f"{len(paths)} files differ from the single run" if paths
+                                       else "identical to the single run"))
+        for path in paths:
+            print(f"  {path}")
+    if any(mismatches.values()):
+        sys.exit(1)
+
+def cmd_lookup(args, parser):
+    from .query import open_query_store, query, result_to_json
+
+    store = open_query_store(args.store)
+    try:
+        result = query(store, args.fips or None, args.state, args.start, args.end)
+    except ValueError as error:
+        parser.error(str(error))
+    print(json.dumps(result_to_json(result), indent=1))
+
+def cmd_serve(args, parser):
+    from .query import open_query_store, serve
+
+    serve(open_query_store(args.store), args.host, args.port)
+
+def cmd_cache(args, parser):
+    from .input_cache import build_cache, cache_dir_for
+    from .paths import INPUT_CSV
+
+    for path in args.csv or [INPUT_CSV]:
+        meta = build_cache(path)
+        print(f"Cached {meta['rows']} rows x {len(meta['columns'])} columns -> {cache_dir_for(path)}")
+
+def cmd_bench(args, parser):
+    from .benchmark import STAGES, run_benchmark, load_results, compare_results, print_comparison
+
+    stages = args.stages.split(',') if args.stages else None
+    if stages and set(stages) - set(STAGES):
+        parser.error(f"--stages must be a comma-separated subset of: {', '.join(STAGES)}")
+    if args.repeat < 1:
+        parser.error('--repeat must be at least 1')
+    if args.months < 36 and (stages is None or {'optimal_tables', 'optimal_figures'} & set(stages)):
+        parser.error('the optimal_tables/optimal_figures stages need --months 36 or more')
+
+    results, path = run_benchmark(args.counties, args.months, args.seed, args.repeat, stages,
+                                  args.map_months, args.reference_rows, not args.no_memory,
+                                  args.label, args.output, args.keep)
+    print(f"Results saved to: {path}")
+    if args.compare:
+        baseline = load_results(args.compare)
+        rows = compare_results(baseline, results, args.threshold)
+        print_comparison(baseline, results, rows)
+        if any(row['regression'] for row in rows):
+            sys.exit(1)
+
+def cmd_bench_compare(args, parser):
+    from .benchmark import load_results, compare_results, print_comparison
+
+    baseline, current = load_results(args.baseline), load_results(args.current)
+    rows = compare_results(baseline, current, args.threshold)
+    print_comparison(baseline, current, rows)
+    if any(row['regression'] for row in rows):
+        sys.exit(1)
+
+def add_trace_argument(command):
+    command.add_argument('--trace', metavar='JSON',
+                         help='Record wall/CPU time, peak RSS and rows of every stage (and month) '
+                              'to this Chrome trace file')
+
+def add_writer_argument(command):
+    command.add_argument('--writer-threads', type=int, default=0, metavar='N',
+                         help='Threads writing finished maps, CSVs and charts in the background while '
+                              'the next month is computed (default: 0, write inline)')
+
+def add_geometry_argument(command):
+    command.add_argument('--geometry-tolerance', type=float, default=0.005, metavar='DEG',
+                         help='Simplification tolerance of the county boundaries embedded in the '
+                              'interactive maps, in degrees; 0 keeps every vertex (default: 0.005)')
+    command.add_argument('--geometry-decimals', type=int, default=3, metavar='N',
+                         help='Decimal places the boundary coordinates are rounded to (default: 3)')
+
+def build_parser():
+    from .paths import RESULT_STORE_PATH, COUNTY_GEOJSON_PATH
+
+    parser = argparse.ArgumentParser(prog='python -m suitability',
+                                     description='Monthly maize land suitability analysis')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='Classify, write maps, summaries and the result store')
+    run.add_argument('--maps', choices=MAP_CHOICES, default='monthly', help=MAPS_HELP)
+    run.add_argument('--workers', type=int, default=1,
+                     help='Number of processes used to write per-month maps and CSVs')
+    run.add_argument('--scenarios', metavar='JSON',
+                     help='Score every alternative criteria set in this file in one pass and write '
+                          'outputs/monthly_suitability/scenarios/ instead of maps')
+    run.add_argument('--incremental', action='store_true',
+                     help='Only rewrite months whose input rows or outputs changed since the '
+                          'last run (tracked in outputs/monthly_suitability/manifest.json)')
+    run.add_argument('--stream', action='store_true',
+                     help='Read the input in chunks and append to the per-month CSVs, keeping '
+                          'memory bounded by --chunk-rows instead of the dataset size')
+    run.add_argument('--chunk-rows', type=int, default=250_000,
+                     help='Rows per chunk in --stream mode (default: 250000)')
+    add_geometry_argument(run)
+    add_writer_argument(run)
+    add_trace_argument(run)
+    run.set_defaults(handler=cmd_run)
+
+    classify = commands.add_parser('classify', help='Classify only: per-month CSVs and the result store')
+    add_writer_argument(classify)
+    add_trace_argument(classify)
+    classify.set_defaults(handler=cmd_classify)
+
+    maps = commands.add_parser('maps', help='Render maps from the classified months')
+    maps.add_argument('--maps', choices=MAP_CHOICES, default='monthly', help=MAPS_HELP)
+    maps.add_argument('--workers', type=int, default=1,
+                      help='Number of processes used to render per-month maps')
+    add_geometry_argument(maps)
+    add_writer_argument(maps)
+    add_trace_argument(maps)
+    maps.set_defaults(handler=cmd_maps)
+
+    summary = commands.add_parser('summary', help='Summary charts, report and INDEX.html')
+    summary.add_argument('--maps', choices=MAP_CHOICES, default='monthly',
+                         help='Which maps INDEX.html links to')
+    add_writer_argument(summary)
+    add_trace_argument(summary)
+    summary.set_defaults(handler=cmd_summary)
+
+    geometry = commands.add_parser('geometry', help='Build the simplified county geometry for the interactive '
+                                                    'maps and compare its size and map time with the full one')
+    add_geometry_argument(geometry)
+    add_trace_argument(geometry)
+    geometry.set_defaults(handler=cmd_geometry)
+
+    cube = commands.add_parser('cube', help='Classify from the dense county x month cube: statistics, '
+                                            'charts, report and result store, no per-month CSVs')
+    cube.add_argument('--maps', choices=MAP_CHOICES, default='png',
+                      help='Which maps INDEX.html links to (png maps render from the result store '
+                           'with the maps command)')
+    add_trace_argument(cube)
+    cube.set_defaults(handler=cmd_cube)
+
+    windows = commands.add_parser('windows', help='Rolling growing-season windows over the monthly results')
+    windows.add_argument('--lengths', default='4,5,6', help='Window lengths in months (default: 4,5,6)')
+    windows.add_argument('--store', default=RESULT_STORE_PATH, help='Result store directory')
+    windows.add_argument('--csv', action='store_true',
+                         help='Also write windows.csv with one row per county, length and start month')
+    add_trace_argument(windows)
+    windows.set_defaults(handler=cmd_windows)
+
+    spatial = commands.add_parser('spatial', help="Neighbour-smoothed scores and global/local Moran's I per month")
+    spatial.add_argument('--contiguity', choices=['queen', 'rook'], default='queen',
+                         help='Neighbours share a boundary vertex (queen) or an edge (rook)')
+    spatial.add_argument('--store', default=RESULT_STORE_PATH, help='Result store directory')
+    spatial.add_argument('--geometry', default=COUNTY_GEOJSON_PATH,
+                         help='County GeoJSON (downloaded there on first use)')
+    add_trace_argument(spatial)
+    spatial.set_defaults(handler=cmd_spatial)
+
+    scenarios = commands.add_parser('scenarios', help='Score alternative criteria sets in one pass')
+    scenarios.add_argument('scenarios', metavar='JSON', help='Scenario definitions')
+    add_trace_argument(scenarios)
+    scenarios.set_defaults(handler=cmd_scenarios)
+
+    optimal = commands.add_parser('optimal', help='Optimal growing conditions from top-yield counties')
+    optimal.add_argument('--bootstrap', type=int, default=0, metavar='N',
+                         help='Draw N bootstrap resamples and write confidence intervals for the '
+                              'optimal ranges and correlations (TABLE1_CI/TABLE3_CI)')
+    optimal.add_argument('--confidence', type=float, default=0.95,
+                         help='Confidence level of the bootstrap intervals (default: 0.95)')
+    optimal.add_argument('--seed', type=int, default=0,
+                         help='Random seed for the bootstrap resamples')
+    optimal.add_argument('--workers', type=int, default=1,
+                         help='Number of processes used to run bootstrap batches')
+    optimal.add_argument('--sweep', metavar='PERCENTILES',
+                         help='Instead of the standard tables, write the optimal ranges for a grid of top-yield '
+                              'percentile cuts (TABLE5/FIG4), e.g. 50:99, 50:99:5 or 75,90,95')
+    add_trace_argument(optimal)
+    optimal.set_defaults(handler=cmd_optimal)
+
+    shard = commands.add_parser('shard', help='Classify a subset of states and write mergeable partial results')
+    shard.add_argument('--states', help='Comma-separated two-digit state FIPS codes, e.g. 17,18,19')
+    shard.add_argument('--shard', metavar='I/N',
+                       help='Take every N-th state present in the input, starting at the I-th (0-based)')
+    shard.add_argument('--output', help='Shard directory (default: outputs/monthly_suitability/shards/<states>)')
+    add_trace_argument(shard)
+    shard.set_defaults(handler=cmd_shard)
+
+    merge = commands.add_parser('merge', help='Combine shards into per-month CSVs, statistics, charts and report')
+    merge.add_argument('shards', nargs='+', help='Shard directories')
+    merge.add_argument('--maps', choices=MAP_CHOICES, default='monthly',
+                       help='Which maps INDEX.html links to (render them afterwards with the maps command)')
+    add_trace_argument(merge)
+    merge.set_defaults(handler=cmd_merge)
+
+    shard_check = commands.add_parser('shard-check', help='Check that merged shards reproduce a single run '
+                                                          'byte for byte (in a scratch directory)')
+    shard_check.add_argument('--shards', default='1,3', help='Comma-separated shard counts to merge (default: 1,3)')
+    shard_check.add_argument('--csv', help='Input CSV (default: inputs/TotalMerged.csv)')
+    shard_check.set_defaults(handler=cmd_shard_check)
+
+    lookup = commands.add_parser('lookup', help='Print result store entries for counties as JSON')
+    lookup.add_argument('fips', nargs='*', help='County FIPS codes')
+    lookup.add_argument('--state', action='append', help='Two-digit state FIPS prefix')
+    lookup.add_argument('--start', help='First month, YYYY-MM')
+    lookup.add_argument('--end', help='Last month, YYYY-MM')
+    lookup.add_argument('--store', default=RESULT_STORE_PATH, help='Result store directory')
+    lookup.set_defaults(handler=cmd_lookup)
+
+    serve = commands.add_parser('serve', help='Serve result store queries over HTTP')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--store', default=RESULT_STORE_PATH, help='Result store directory')
+    serve.set_defaults(handler=cmd_serve)
+
+    cache = commands.add_parser('cache', help='Build the columnar input cache ahead of time')
+    cache.add_argument('csv', nargs='*', help='Input CSVs (default: inputs/TotalMerged.csv)')
+    cache.set_defaults(handler=cmd_cache)
+
+    bench = commands.add_parser('bench', help='Time and memory-profile every stage on synthetic data')
+    bench.add_argument('--counties', type=int, default=3000, help='Synthetic counties (default: 3000)')
+    bench.add_argument('--months', type=int, default=60, help='Synthetic months (default: 60)')
+    bench.add_argument('--seed', type=int, default=0, help='Random seed of the synthetic data')
+    bench.add_argument('--repeat', type=int, default=3, help='Timed runs per stage; the best is compared')
+    bench.add_argument('--stages', help='Comma-separated subset of stages to run (default: all)')
+    bench.add_argument('--map-months', type=int, default=3,
+                       help='Months rendered by the map_html and map_png stages (default: 3)')
+    bench.add_argument('--reference-rows', type=int, default=20_000,
+                       help='Rows scored by the row-wise reference classifier (default: 20000)')
+    bench.add_argument('--no-memory', action='store_true',
+                       help='Skip the extra tracemalloc run of each stage')
+    bench.add_argument('--label', help='Name recorded in the results (default: git commit)')
+    bench.add_argument('--output', help='Results JSON path (default: outputs/benchmarks/<time>_<label>_<size>.json)')
+    bench.add_argument('--keep', action='store_true', help='Keep the scratch directory with the stage outputs')
+    bench.add_argument('--compare', metavar='JSON', help='Compare against these baseline results; '
+                                                         'exit 1 on a regression')
+    bench.add_argument('--threshold', type=float, default=0.10,
+                       help='Relative change treated as a regression (default: 0.10)')
+    bench.set_defaults(handler=cmd_bench)
+
+    bench_compare = commands.add_parser('bench-compare', help='Compare two benchmark results files')
+    bench_compare.add_argument('baseline', help='Baseline results JSON')
+    bench_compare.add_argument('current', help='Results JSON to check')
+    bench_compare.add_argument('--threshold', type=float, default=0.10,
+                               help='Relative change treated as a regression (default: 0.10)')
+    bench_compare.set_defaults(handler=cmd_bench_compare)
+
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    if not getattr(args, 'trace', None):
+        args.handler(args, parser)
+        return
+
+    from . import trace
+    trace.enable()
+    try:
+        with trace.stage(args.command):
+            args.handler(args, parser)
+    finally:
+        trace.write(args.trace)
+        print(f"Trace saved to: {args.trace}")
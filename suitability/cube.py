@@ -0,0 +1,221 @@
+"""Dense counties x months x variables cube of the monthly input
+
+The long-format table repeats every soil value once per month and keeps climate values as
+float64. The cube stores the same data as:
+
+- climate: float32 (counties, months, variables), NaN where a county has no row
+- present: bool (counties, months), True where the input had a row
+- soil, mukey: one row per county, float64; soil values sit exactly on criteria bounds
+  (db = 1.4, ph = 7.3), so they keep full precision
+- fips / months: sorted FIPS codes and 'YYYY-MM' labels indexing the first two axes
+
+A county's climate time series is the contiguous block climate[i], with no filtering
+or copying. classify_cube and cube_month_stats score it and summarize months directly.
+"""
+
+import pandas as pd
+import numpy as np
+
+from .classify import (DEFAULT_CRITERIA, DEFAULT_CLASS_CUTOFFS, SOIL_COLUMNS, compile_criteria,
+                       subset_criteria, criteria_points, finalize_month_stats, COUNT_COLUMNS)
+from .input_cache import load_columns
+from .paths import INPUT_CSV
+from .result_store import empty_store, month_labels, VALUE_COLUMNS
+
+CLIMATE_COLUMNS = ['ppt', 'tmin', 'tmean', 'tmax']
+
+def criteria_bounds(column, criteria=DEFAULT_CRITERIA):
+    """Finite range bounds the criteria compare column against, in column units"""
+    rows = criteria[criteria['column'] == column]
+    bounds = np.concatenate([rows['low'] / rows['scale'], rows['high'] / rows['scale']])
+    return np.unique(bounds[np.isfinite(bounds)])
+
+def float32_crosses_bounds(values, bounds):
+    """True if rounding values to float32 moves any of them across (or onto) a bound"""
+    rounded = values.astype(np.float32).astype(np.float64)
+    valid = ~np.isnan(values)
+    return any(np.any(np.sign(values[valid] - bound) != np.sign(rounded[valid] - bound)) for bound in bounds)
+
+def _per_county(values, first_row, county_pos, name):
+    """values of each county's first row; raises if the column varies within a county"""
+    per_county = np.asarray(values, dtype=np.float64)[first_row]
+    expanded = per_county[county_pos]
+    varies = ~((expanded == values) | (np.isnan(expanded) & np.isnan(values)))
+    if varies.any():
+        raise ValueError(f"'{name}' varies within county {county_pos[np.argmax(varies)]}; "
+                         f"it cannot be stored once per county")
+    return per_county
+
+def build_cube(columns, dtype=np.float32, criteria=DEFAULT_CRITERIA):
+    """Cube dict from long-format columns (a DataFrame or a dict of arrays)
+
+    Needs FIPS (integers or zero-padded strings), Year, Month, the climate columns and the
+    soil columns. If rounding a climate column to float32 would move any value across a
+    criteria bound, the cube is stored as float64 instead so classification is unchanged.
+    """
+
+    fips = np.asarray(columns['FIPS'])
+    if fips.dtype.kind in 'iu':
+        fips_ids, county_pos = np.unique(fips, return_inverse=True)
+        fips_index = np.array([f'{code:05d}' for code in fips_ids], dtype='U5')
+    else:
+        fips_index, county_pos = np.unique(fips.astype('U5'), return_inverse=True)
+    month_ids = (np.asarray(columns['Year'], dtype=np.int64) * 12
+                 + np.asarray(columns['Month'], dtype=np.int64) - 1)
+    month_index, month_pos = np.unique(month_ids, return_inverse=True)
+    n_counties, n_months = len(fips_index), len(month_index)
+
+    present = np.zeros((n_counties, n_months), dtype=bool)
+    present[county_pos, month_pos] = True
+    if present.sum() != len(month_ids):
+        raise ValueError("More than one input row for some county and month")
+
+    if dtype == np.float32:
+        for name in CLIMATE_COLUMNS:
+            values = np.asarray(columns[name], dtype=np.float64)
+            if float32_crosses_bounds(values, criteria_bounds(name, criteria)):
+                print(f"'{name}' is not exact enough in float32 near a criteria bound; using float64")
+                dtype = np.float64
+                break
+
+    climate = np.full((n_counties, n_months, len(CLIMATE_COLUMNS)), np.nan, dtype=dtype)
+    for v, name in enumerate(CLIMATE_COLUMNS):
+        climate[county_pos, month_pos, v] = columns[name]
+
+    first_row = np.unique(county_pos, return_index=True)[1]
+    soil = np.column_stack([_per_county(columns[name], first_row, county_pos, name)
+                            for name in SOIL_COLUMNS])
+    mukey = _per_county(columns['mukey'], first_row, county_pos, 'mukey') if 'mukey' in columns else None
+
+    return {
+        'fips': fips_index,
+        'months': month_labels(month_index // 12, month_index % 12 + 1),
+        'climate_variables': list(CLIMATE_COLUMNS),
+        'climate': climate,
+        'present': present,
+        'soil_variables': list(SOIL_COLUMNS),
+        'soil': soil,
+        'mukey': mukey
+    }
+
+def load_cube(csv_path=INPUT_CSV, dtype=np.float32):
+    """Cube straight from the columnar input cache, one memory-mapped column at a time"""
+    names = ['FIPS', 'Year', 'Month'] + CLIMATE_COLUMNS + ['mukey'] + SOIL_COLUMNS
+    return build_cube(load_columns(csv_path, names, widen=False), dtype)
+
+def cube_nbytes(cube):
+    return sum(value.nbytes for value in cube.values() if isinstance(value, np.ndarray))
+
+def county_position(cube, fips):
+    i = np.searchsorted(cube['fips'], fips)
+    if i == len(cube['fips']) or cube['fips'][i] != fips:
+        raise KeyError(f"Unknown FIPS {fips!r}")
+    return i
+
+def county_series(cube, fips):
+    """(months, climate (months, variables) view, soil values) of one county"""
+    i = county_position(cube, fips)
+    return cube['months'], cube['climate'][i], cube['soil'][i]
+
+def month_frame(cube, month):
+    """Long-format rows (FIPS, Year, Month, climate, mukey, soil) of one 'YYYY-MM' month"""
+    j = int(np.searchsorted(cube['months'], month))
+    if j == len(cube['months']) or cube['months'][j] != month:
+        raise KeyError(f"Unknown month {month!r}")
+    rows = np.flatnonzero(cube['present'][:, j])
+    frame = pd.DataFrame({'FIPS': cube['fips'][rows], 'Year': int(month[:4]), 'Month': int(month[5:])})
+    for v, name in enumerate(cube['climate_variables']):
+        frame[name] = cube['climate'][rows, j, v].astype(np.float64)
+    if cube['mukey'] is not None:
+        frame['mukey'] = cube['mukey'][rows]
+    for s, name in enumerate(cube['soil_variables']):
+        frame[name] = cube['soil'][rows, s]
+    return frame
+
+def classify_cube(cube, criteria=DEFAULT_CRITERIA, cutoffs=DEFAULT_CLASS_CUTOFFS, chunk_cells=None):
+    """Score every county and month of the cube; returns (counties, months) codes and scores
+
+    Same criteria and arithmetic as classify_suitability_batch: soil criteria are scored
+    once per county, climate criteria per cell, added in table order. Codes are 0 and
+    scores NaN where the county has no row that month.
+    """
+
+    compiled = compile_criteria([criteria])
+    n_criteria = len(compiled['criteria'])
+    is_soil = np.array([compiled['columns'][compiled['column_index'][0, c]] in SOIL_COLUMNS
+                        for c in range(n_criteria)], dtype=bool)
+    climate, soil = subset_criteria(compiled, ~is_soil), subset_criteria(compiled, is_soil)
+    unknown = set(climate['columns']) - set(cube['climate_variables'])
+    if unknown:
+        raise ValueError(f"The cube has no climate variable(s) {', '.join(sorted(unknown))}")
+
+    soil_values = np.stack([cube['soil'][:, cube['soil_variables'].index(name)] for name in soil['columns']]) \
+        if soil['columns'] else np.zeros((0, len(cube['fips'])))
+    soil_points = criteria_points(soil_values, soil)[0]
+    climate_slot, soil_slot = np.cumsum(~is_soil) - 1, np.cumsum(is_soil) - 1
+    variable_index = [cube['climate_variables'].index(name) for name in climate['columns']]
+
+    n_counties, n_months = cube['present'].shape
+    _, _, n_levels, n_ranges = compiled['low'].shape
+    if chunk_cells is None:
+        chunk_cells = max(1024, (1 << 24) // (max(n_criteria, 1) * n_levels * n_ranges))
+    chunk_counties = max(1, chunk_cells // max(n_months, 1))
+
+    score = np.zeros((n_counties, n_months))
+    for start in range(0, n_counties, chunk_counties):
+        stop = min(start + chunk_counties, n_counties)
+        block = cube['climate'][start:stop][:, :, variable_index].astype(np.float64)
+        values = block.reshape(-1, len(variable_index)).T
+        climate_points = criteria_points(values, climate)[0].reshape(-1, stop - start, n_months)
+        for c in range(n_criteria):
+            if is_soil[c]:
+                score[start:stop] += soil_points[soil_slot[c], start:stop, None]
+            else:
+                score[start:stop] += climate_points[climate_slot[c]]
+
+    percentage = (score / compiled['max_points'][0].sum()) * 100
+    low_s1, low_s2, low_s3 = cutoffs
+    codes = np.where(percentage >= low_s1, 1,
+                     np.where(percentage >= low_s2, 2, np.where(percentage >= low_s3, 3, 4)))
+
+    variables = cube['climate_variables']
+    temps = [cube['climate'][:, :, variables.index(name)] for name in ('tmin', 'tmax', 'tmean')]
+    no_data = ((np.isnan(temps[0]) & np.isnan(temps[1]) & np.isnan(temps[2]))
+               | ((temps[0] == 0) & (temps[1] == 0) & (temps[2] == 0))
+               | np.isnan(cube['climate'][:, :, variables.index('ppt')]))
+    codes = np.where(no_data, 5, codes)
+    percentage = np.where(no_data, 0.0, percentage)
+
+    absent = ~cube['present']
+    codes = np.where(absent, 0, codes).astype(np.uint8)
+    percentage[absent] = np.nan
+    return codes, percentage
+
+def cube_month_stats(cube, codes, scores):
+    """monthly_statistics rows (as summarize_months) from classify_cube output"""
+
+    months = cube['months']
+    partials = pd.DataFrame({
+        'Year': [int(label[:4]) for label in months],
+        'Month': [int(label[5:]) for label in months],
+        'Total_Counties': cube['present'].sum(axis=0),
+        **{name: (codes == code).sum(axis=0) for code, name in enumerate(COUNT_COLUMNS, start=1)},
+        'Score_Sum': np.nansum(scores, axis=0)
+    }).set_index(['Year', 'Month'])
+    return finalize_month_stats(partials[partials['Total_Counties'] > 0])
+
+def cube_result_store(cube, codes, scores):
+    """Result store dict (as build_result_matrices) from the cube and its classification"""
+
+    variables = [name for name in VALUE_COLUMNS if name in cube['climate_variables'] + cube['soil_variables']]
+    store = empty_store(cube['fips'], cube['months'], variables)
+    store['codes'][:] = codes
+    store['scores'][:] = scores
+    present = cube['present']
+    for v, name in enumerate(variables):
+        if name in cube['climate_variables']:
+            store['values'][:, :, v] = cube['climate'][:, :, cube['climate_variables'].index(name)]
+        else:
+            column = cube['soil'][:, cube['soil_variables'].index(name)].astype(np.float32)
+            store['values'][:, :, v] = np.where(present, column[:, None], np.nan)
+    return store
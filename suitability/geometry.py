@@ -0,0 +1,275 @@
+"""County boundaries: the local GeoJSON copy, and a simplified, quantized version for plotly maps
+
+The interactive maps used to pass plotly.js the county GeoJSON URL, so every map opened
+in a browser downloaded the full-resolution boundaries again. Now the GeoJSON is
+downloaded once to inputs/.cache, the same copy the PNG maps and spatial statistics use.
+map_geometry() returns a lighter version that is embedded in the maps.
+
+The simplification preserves topology. Each ring is cut into arcs at every vertex where
+the set of counties sharing the boundary changes. Each arc is simplified with
+Douglas-Peucker once, in a canonical direction, and the counties on either side of a
+border reuse that line, so there are no gaps or overlaps between them. Coordinates are
+then rounded to `decimals` places and repeated points dropped. The result is cached
+under inputs/.cache/county_geometry/, keyed on the source content and the settings.
+"""
+
+import numpy as np
+from functools import lru_cache
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+import urllib.request
+
+from .paths import CACHE_DIR, COUNTY_GEOJSON_URL, COUNTY_GEOJSON_PATH, month_name
+
+GEOMETRY_PATH = COUNTY_GEOJSON_PATH
+GEOMETRY_CACHE_DIR = f'{CACHE_DIR}/county_geometry'
+GEOMETRY_VERSION = 1
+
+# Degrees; about 500 m and 100 m of latitude
+DEFAULT_TOLERANCE = 0.005
+DEFAULT_DECIMALS = 3
+
+# Vertices closer than this (degrees) are the same point
+VERTEX_DECIMALS = 6
+
+# Settings map_geometry() uses when called without arguments; see configure()
+_settings = {'tolerance': DEFAULT_TOLERANCE, 'decimals': DEFAULT_DECIMALS}
+
+# Seconds to wait for the GeoJSON server to answer
+DOWNLOAD_TIMEOUT = 60
+
+def fetch_county_geometry(path=GEOMETRY_PATH, url=COUNTY_GEOJSON_URL):
+    """Download the county GeoJSON to path once; later runs work offline from that copy"""
+    if os.path.exists(path):
+        return path
+    print(f"Downloading county geometry to {path}...")
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    try:
+        with urllib.request.urlopen(url, timeout=DOWNLOAD_TIMEOUT) as response:
+            payload = response.read()
+    except OSError as error:  # URLError, timeouts and dropped connections
+        raise RuntimeError(f"Could not download the county geometry from {url} ({error}). "
+                           f"Download it by hand and save it as {path}, then run again.") from error
+    with open(path + '.tmp', 'wb') as f:
+        f.write(payload)
+    os.replace(path + '.tmp', path)
+    return path
+
+def load_county_geometry(path=GEOMETRY_PATH):
+    with open(fetch_county_geometry(path), encoding='utf-8') as f:
+        return json.load(f)
+
+def douglas_peucker(points, tolerance):
+    """Keep mask of the (n, 2) polyline simplified to within tolerance; both ends are kept"""
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        start, direction = points[first], points[last] - points[first]
+        offsets = points[first + 1:last] - start
+        length = np.hypot(*direction)
+        if length > 0:
+            distance = np.abs(direction[0] * offsets[:, 1] - direction[1] * offsets[:, 0]) / length
+        else:
+            distance = np.hypot(offsets[:, 0], offsets[:, 1])
+        i = int(np.argmax(distance))
+        if distance[i] > tolerance:
+            split = first + 1 + i
+            keep[split] = True
+            stack += [(first, split), (split, last)]
+    return keep
+
+def _polygons(geometry):
+    if geometry is None:
+        return []
+    return [geometry['coordinates']] if geometry['type'] == 'Polygon' else geometry['coordinates']
+
+def _open_rings(geojson):
+    """(feature, polygon, ring, (n, 2) points without the closing repeat) of every ring"""
+    rings = []
+    for f, feature in enumerate(geojson['features']):
+        for p, polygon in enumerate(_polygons(feature['geometry'])):
+            for r, ring in enumerate(polygon):
+                points = np.asarray(ring, dtype=np.float64)[:, :2]
+                if len(points) > 1 and np.array_equal(points[0], points[-1]):
+                    points = points[:-1]
+                rings.append((f, p, r, points))
+    return rings
+
+def ring_keep_masks(rings, n_features, tolerance):
+    """Douglas-Peucker keep mask of every ring, with borders between counties simplified alike
+
+    A vertex is an arc end (always kept) where the set of features sharing it differs from
+    the set at the previous or next vertex. Rings with fewer than two arc ends are cut at
+    their lowest vertex id and the vertex farthest from it, which both neighbours pick the
+    same way.
+    """
+
+    points = np.concatenate([ring for *_, ring in rings])
+    owners = np.concatenate([np.full(len(ring), f) for f, _, _, ring in rings])
+    keys = np.round(points * 10 ** VERTEX_DECIMALS).astype(np.int64)
+    vertex = np.unique(keys, axis=0, return_inverse=True)[1].ravel()
+
+    # Order-independent signature of the features sharing each vertex
+    feature_keys = np.random.default_rng(0).integers(1, 2 ** 62, size=n_features, dtype=np.int64)
+    pairs = np.unique(np.column_stack([vertex, owners]), axis=0)
+    signature = np.zeros(vertex.max() + 1, dtype=np.int64)
+    np.bitwise_xor.at(signature, pairs[:, 0], feature_keys[pairs[:, 1]])
+
+    masks, arcs, offset = [], {}, 0
+    for *_, ring in rings:
+        n = len(ring)
+        ids = vertex[offset:offset + n]
+        offset += n
+        if n < 4:
+            masks.append(np.ones(n, dtype=bool))
+            continue
+
+        ring_signature = signature[ids]
+        ends = np.flatnonzero((ring_signature != np.roll(ring_signature, 1))
+                              | (ring_signature != np.roll(ring_signature, -1)))
+        if len(ends) < 2:
+            first = int(np.argmin(ids))
+            far = int(np.argmax(np.hypot(*(ring - ring[first]).T)))
+            ends = np.unique(np.r_[ends, first, far])
+            if len(ends) < 2:
+                masks.append(np.ones(n, dtype=bool))
+                continue
+
+        keep = np.zeros(n, dtype=bool)
+        keep[ends] = True
+        for start, stop in zip(ends, np.r_[ends[1:], ends[0] + n]):
+            arc = np.arange(start, stop + 1) % n
+            # Simplify in a canonical direction so both sides of a border agree
+            if ids[arc[0]] > ids[arc[-1]] or (ids[arc[0]] == ids[arc[-1]] and ids[arc[1]] > ids[arc[-2]]):
+                arc = arc[::-1]
+            # The county on the other side finds the same arc here
+            key = ids[arc].tobytes()
+            if key not in arcs:
+                arcs[key] = douglas_peucker(ring[arc], tolerance)
+            keep[arc[arcs[key]]] = True
+
+        # A ring simplified below a triangle keeps all its points
+        masks.append(keep if keep.sum() >= 3 else np.ones(n, dtype=bool))
+    return masks
+
+def _quantize(points, decimals):
+    """Closed ring rounded to decimals with repeated points removed; None below a triangle"""
+    rounded = np.round(points, decimals)
+    distinct = np.r_[True, np.any(rounded[1:] != rounded[:-1], axis=1)]
+    rounded = rounded[distinct]
+    if len(rounded) > 1 and np.array_equal(rounded[0], rounded[-1]):
+        rounded = rounded[:-1]
+    if len(rounded) < 3:
+        return None
+    return np.vstack([rounded, rounded[:1]]).tolist()
+
+def simplify_counties(geojson, tolerance=DEFAULT_TOLERANCE, decimals=DEFAULT_DECIMALS):
+    """FeatureCollection with topology-preserving simplified, quantized county polygons
+
+    Only each feature's id is kept. Polygons and holes that collapse when rounded are
+    dropped. A county left with no polygon keeps its first polygon at full precision.
+    """
+
+    rings = _open_rings(geojson)
+    masks = ring_keep_masks(rings, len(geojson['features']), tolerance) if tolerance > 0 and rings \
+        else [np.ones(len(ring), dtype=bool) for *_, ring in rings]
+
+    simplified = {}
+    for (f, p, r, ring), keep in zip(rings, masks):
+        simplified[f, p, r] = _quantize(ring[keep], decimals)
+
+    features = []
+    for f, feature in enumerate(geojson['features']):
+        polygons = []
+        for p, polygon in enumerate(_polygons(feature['geometry'])):
+            exterior = simplified.get((f, p, 0))
+            if exterior is not None:
+                holes = [simplified[f, p, r] for r in range(1, len(polygon)) if simplified[f, p, r] is not None]
+                polygons.append([exterior] + holes)
+        if not polygons:
+            original = _polygons(feature['geometry'])
+            if not original:
+                continue
+            polygons = [[[point[:2] for point in ring] for ring in original[0]]]
+        geometry = ({'type': 'Polygon', 'coordinates': polygons[0]} if len(polygons) == 1
+                    else {'type': 'MultiPolygon', 'coordinates': polygons})
+        features.append({'type': 'Feature', 'id': feature.get('id'), 'properties': {}, 'geometry': geometry})
+    return {'type': 'FeatureCollection', 'features': features}
+
+def geometry_payload(geojson):
+    """Compact JSON text of a GeoJSON, as embedded in the maps"""
+    return json.dumps(geojson, separators=(',', ':'))
+
+def geometry_stats(geojson):
+    """Vertex count and compact/gzipped JSON size in bytes"""
+    payload = geometry_payload(geojson).encode('utf-8')
+    vertices = sum(len(ring) for feature in geojson['features']
+                   for polygon in _polygons(feature['geometry']) for ring in polygon)
+    return {'features': len(geojson['features']), 'vertices': vertices,
+            'bytes': len(payload), 'gzip_bytes': len(gzip.compress(payload, compresslevel=6))}
+
+def configure(tolerance=DEFAULT_TOLERANCE, decimals=DEFAULT_DECIMALS):
+    """Set what map_geometry() returns when called without arguments (e.g. from CLI options)"""
+    _settings.update(tolerance=tolerance, decimals=decimals)
+
+@lru_cache(maxsize=None)
+def _cached_geometry(geometry_path, tolerance, decimals, cache_dir):
+    with open(fetch_county_geometry(geometry_path), 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:16]
+    cache_path = os.path.join(cache_dir, f'v{GEOMETRY_VERSION}_{digest}_{tolerance:g}_{decimals}.json')
+    if os.path.exists(cache_path):
+        with open(cache_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    geojson = simplify_counties(load_county_geometry(geometry_path), tolerance, decimals)
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(cache_path + '.tmp', 'w', encoding='utf-8') as f:
+        f.write(geometry_payload(geojson))
+    os.replace(cache_path + '.tmp', cache_path)
+    return geojson
+
+def map_geometry(tolerance=None, decimals=None, geometry_path=GEOMETRY_PATH, cache_dir=GEOMETRY_CACHE_DIR):
+    """Simplified county GeoJSON for the plotly maps, built once per source and settings
+
+    Loaded once per process (load before forking so workers inherit it). The returned
+    dict is shared, so do not modify it.
+    """
+    tolerance = _settings['tolerance'] if tolerance is None else tolerance
+    decimals = _settings['decimals'] if decimals is None else decimals
+    return _cached_geometry(geometry_path, float(tolerance), int(decimals), cache_dir)
+
+def geometry_report(tolerance=DEFAULT_TOLERANCE, decimals=DEFAULT_DECIMALS, df_month=None,
+                    geometry_path=GEOMETRY_PATH):
+    """Rows comparing the full and the simplified geometry: vertices, JSON and gzip bytes
+
+    With df_month (one month's classified rows), each row also gets the seconds to build
+    and write that month's map HTML with the geometry embedded, and the HTML size.
+    """
+
+    full = load_county_geometry(geometry_path)
+    start = time.perf_counter()
+    simplified = simplify_counties(full, tolerance, decimals)
+    simplify_seconds = time.perf_counter() - start
+
+    rows = [dict(geometry='full', **geometry_stats(full)),
+            dict(geometry=f'simplified ({tolerance:g} deg, {decimals} decimals)', **geometry_stats(simplified),
+                 simplify_s=round(simplify_seconds, 2))]
+    if df_month is not None:
+        from .maps import render_month_map
+        year, month = int(df_month['Year'].iloc[0]), int(df_month['Month'].iloc[0])
+        with tempfile.TemporaryDirectory() as tmp:
+            for row, geojson in zip(rows, (full, simplified)):
+                filename = os.path.join(tmp, f"{row['geometry'].split()[0]}.html")
+                start = time.perf_counter()
+                render_month_map(df_month, year, month_name(year, month), filename, geojson)
+                row['render_s'] = round(time.perf_counter() - start, 2)
+                row['html_bytes'] = os.path.getsize(filename)
+    return rows
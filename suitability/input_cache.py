@@ -0,0 +1,140 @@
+"""Columnar cache for the merged input CSV"""
+
+import pandas as pd
+import numpy as np
+import hashlib
+import json
+import os
+import shutil
+
+CACHE_VERSION = 1
+
+def cache_dir_for(csv_path):
+    """inputs/TotalMerged.csv -> inputs/.cache/TotalMerged"""
+    folder, name = os.path.split(csv_path)
+    return os.path.join(folder, '.cache', os.path.splitext(name)[0])
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _compact(values):
+    """Smallest dtype that reproduces the CSV values exactly"""
+    if values.dtype.kind in 'iu':
+        if values.size == 0 or (values.min() >= np.iinfo(np.int32).min and
+                                values.max() <= np.iinfo(np.int32).max):
+            return values.astype(np.int32)
+        return values
+    if values.dtype.kind == 'f':
+        as_float32 = values.astype(np.float32)
+        if np.array_equal(as_float32.astype(np.float64), values, equal_nan=True):
+            return as_float32
+    return values
+
+def build_cache(csv_path, cache_dir=None, source_hash=None):
+    """Parse the CSV once and write one .npy file per column plus meta.json"""
+    cache_dir = cache_dir or cache_dir_for(csv_path)
+    if os.path.isdir(cache_dir):
+        shutil.rmtree(cache_dir)
+    os.makedirs(cache_dir)
+
+    df = pd.read_csv(csv_path)
+    columns = []
+    for i, name in enumerate(df.columns):
+        values = df[name].to_numpy()
+        entry = {'name': name, 'file': f'col_{i:03d}.npy'}
+
+        if name == 'FIPS':
+            # Stored both as integers (as read_csv sees them) and as zero-padded category codes
+            fips = values.astype(np.int32)
+            categories, codes = np.unique(fips, return_inverse=True)
+            np.save(os.path.join(cache_dir, 'fips_codes.npy'), codes.astype(np.int32))
+            entry['fips_categories'] = [f'{c:05d}' for c in categories]
+            values = fips
+        elif values.dtype == object:
+            raise ValueError(f"Column '{name}' is not numeric; the input cache only stores numeric columns")
+        else:
+            values = _compact(values)
+
+        np.save(os.path.join(cache_dir, entry['file']), values)
+        columns.append(entry)
+
+    stat = os.stat(csv_path)
+    meta = {
+        'version': CACHE_VERSION,
+        'source_size': stat.st_size,
+        'source_mtime_ns': stat.st_mtime_ns,
+        'source_sha256': source_hash or file_sha256(csv_path),
+        'rows': len(df),
+        'columns': columns
+    }
+    # meta.json is written last; a cache without it is treated as missing
+    with open(os.path.join(cache_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=1)
+    return meta
+
+def _valid_meta(csv_path, cache_dir):
+    """(meta, None) if the cache still describes csv_path, else (None, hash if one was computed)"""
+    meta_path = os.path.join(cache_dir, 'meta.json')
+    if not os.path.exists(meta_path):
+        return None, None
+    with open(meta_path, encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('version') != CACHE_VERSION:
+        return None, None
+
+    stat = os.stat(csv_path)
+    if meta['source_size'] == stat.st_size and meta['source_mtime_ns'] == stat.st_mtime_ns:
+        return meta, None
+
+    # Touched but possibly unchanged: fall back to the content hash
+    source_hash = file_sha256(csv_path)
+    if meta['source_sha256'] == source_hash:
+        meta['source_mtime_ns'] = stat.st_mtime_ns
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=1)
+        return meta, None
+    return None, source_hash
+
+def load_columns(csv_path, columns=None, padded_fips=False, cache_dir=None, mmap=True, widen=True):
+    """Column arrays of the merged table (all, or the named ones) from the columnar cache
+
+    The cache is rebuilt first if the CSV changed. padded_fips=True returns FIPS as
+    zero-padded strings ('01001'), otherwise as integers exactly like pd.read_csv.
+    widen=False keeps float32 columns as stored (memory-mapped, no copy).
+    """
+    cache_dir = cache_dir or cache_dir_for(csv_path)
+    meta, source_hash = _valid_meta(csv_path, cache_dir)
+    if meta is None:
+        meta = build_cache(csv_path, cache_dir, source_hash)
+
+    entries = {entry['name']: entry for entry in meta['columns']}
+    missing = set(columns or ()) - set(entries)
+    if missing:
+        raise KeyError(f"{csv_path} has no column(s) {', '.join(sorted(missing))}")
+
+    mmap_mode = 'r' if mmap else None
+    data = {}
+    for name in columns or list(entries):
+        entry = entries[name]
+        if name == 'FIPS' and padded_fips:
+            codes = np.load(os.path.join(cache_dir, 'fips_codes.npy'), mmap_mode=mmap_mode)
+            data['FIPS'] = np.array(entry['fips_categories'], dtype=object).take(codes)
+        else:
+            values = np.load(os.path.join(cache_dir, entry['file']), mmap_mode=mmap_mode)
+            if values.dtype == np.float32 and widen:
+                # Lossless on disk; widened so downstream maths and CSV formatting match read_csv
+                values = values.astype(np.float64)
+            data[name] = values
+    return data
+
+def load_merged(csv_path, padded_fips=False, cache_dir=None, mmap=True):
+    """Load the merged table through the columnar cache, rebuilding it if the CSV changed
+
+    padded_fips=True returns FIPS as zero-padded strings ('01001'), otherwise as
+    integers exactly like pd.read_csv.
+    """
+    return pd.DataFrame(load_columns(csv_path, padded_fips=padded_fips, cache_dir=cache_dir, mmap=mmap))
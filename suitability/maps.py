@@ -0,0 +1,165 @@
+"""Interactive plotly maps: one choropleth HTML per month, or a single slider viewer
+
+The county boundaries are embedded in the HTML (geometry.map_geometry, simplified and
+quantized), so the maps open without network access to the GeoJSON.
+"""
+
+import pandas as pd
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+from datetime import datetime
+
+from .classify import SUITABILITY_CLASSES, CLASS_COLORS
+from .geometry import map_geometry
+
+# px.choropleth gets this placeholder; split_geometry then fills in each trace's features
+EMPTY_GEOJSON = {'type': 'FeatureCollection', 'features': []}
+
+def split_geometry(fig, geojson):
+    """Give each choropleth trace only the features of its own locations
+
+    px.choropleth makes one trace per class and would copy (and validate) the whole
+    geometry into each; split this way, every county's boundary is in the HTML once.
+    """
+    features = {feature['id']: feature for feature in geojson['features']}
+    for trace in fig.data:
+        trace.geojson = {'type': 'FeatureCollection',
+                         'features': [features[fips] for fips in trace.locations if fips in features]}
+
+def month_map_figure(df_month, year, month_name, geojson=None):
+    """Choropleth figure of one month; geojson defaults to map_geometry()"""
+    
+    geojson = map_geometry() if geojson is None else geojson
+    fig = px.choropleth(
+        df_month,
+        geojson=EMPTY_GEOJSON,
+        locations='FIPS',
+        color='Suitability_Class',
+        color_discrete_map=CLASS_COLORS,
+        category_orders={'Suitability_Class': ['Highly Suitable (S1)', 
+                                               'Moderately Suitable (S2)', 
+                                               'Marginally Suitable (S3)', 
+                                               'Not Suitable (N)',
+                                               'No Data']},
+        scope="usa",
+        hover_data={'FIPS': True, 
+                   'Suitability_Score': ':.1f',
+                   'ppt': ':.1f',
+                   'tmin': ':.1f',
+                   'tmean': ':.1f',
+                   'tmax': ':.1f',
+                   'ph': ':.2f',
+                   'om': ':.2f',
+                   'clay': ':.1f',
+                   'sand': ':.1f',
+                   'aws': ':.3f',
+                   'db': ':.2f'},
+        title=f'<b>Land Suitability - {month_name} {year}</b>',
+        labels={
+            'ppt': 'Precipitation (mm)',
+            'tmin': 'Min Temp (C)',
+            'tmean': 'Mean Temp (C)',
+            'tmax': 'Max Temp (C)',
+            'ph': 'Soil pH',
+            'om': 'Organic Matter (%)',
+            'clay': 'Clay (%)',
+            'sand': 'Sand (%)',
+            'aws': 'Water Storage (cm/cm)',
+            'db': 'Bulk Density (g/cm3)',
+            'Suitability_Score': 'Score (%)'
+        }
+    )
+    
+    fig.update_layout(
+        title_font_size=20,
+        title_x=0.5,
+        geo=dict(lakecolor='rgb(255, 255, 255)', bgcolor='rgba(0,0,0,0)'),
+        height=600,
+        margin={"r":0,"t":60,"l":0,"b":0},
+        legend=dict(title="Class", orientation="v", yanchor="middle", 
+                   y=0.5, xanchor="left", x=0.01)
+    )
+    split_geometry(fig, geojson)
+    return fig
+
+def render_month_map(df_month, year, month_name, filename, geojson=None):
+    """Standalone choropleth HTML for one month"""
+    month_map_figure(df_month, year, month_name, geojson).write_html(filename)
+
+def write_slider_viewer(data, month_slices, filename, geojson=None):
+    """Single-page viewer: plotly.js and county geometry load once, a slider switches months"""
+    
+    fips_index = pd.Index(np.sort(data['FIPS'].unique()))
+    
+    # Discrete colorscale over codes 1-5 (S1, S2, S3, N, No Data)
+    colors = [CLASS_COLORS[name] for name in SUITABILITY_CLASSES]
+    colorscale = []
+    for i, color in enumerate(colors):
+        colorscale += [[i / len(colors), color], [(i + 1) / len(colors), color]]
+    
+    frames = []
+    steps = []
+    for (year, month), rows in month_slices.items():
+        df_month = data.iloc[rows]
+        positions = fips_index.get_indexer(df_month['FIPS'])
+        
+        # Compact per-county arrays aligned to fips_index; counties absent this month stay blank
+        codes = np.full(len(fips_index), np.nan, dtype=np.float32)
+        codes[positions] = df_month['Suitability_Code'].to_numpy()
+        # Hover text: the class label and score, as in the per-month maps
+        hover = np.full((len(fips_index), 2), None, dtype=object)
+        hover[positions, 0] = df_month['Suitability_Class'].to_numpy()
+        hover[positions, 1] = df_month['Suitability_Score'].round(1).to_numpy()
+        
+        name = f"{year}-{month:02d}"
+        month_name = datetime(year, month, 1).strftime('%B')
+        frames.append(go.Frame(
+            name=name,
+            data=[go.Choropleth(z=codes, customdata=hover)],
+            layout=dict(title_text=f'<b>Land Suitability - {month_name} {year}</b>')
+        ))
+        steps.append(dict(
+            method='animate',
+            label=datetime(year, month, 1).strftime('%b %Y'),
+            args=[[name], {'mode': 'immediate',
+                           'frame': {'duration': 0, 'redraw': True},
+                           'transition': {'duration': 0}}]
+        ))
+    
+    fig = go.Figure(
+        data=[go.Choropleth(
+            geojson=map_geometry() if geojson is None else geojson,
+            locations=fips_index,
+            z=frames[0].data[0].z,
+            customdata=frames[0].data[0].customdata,
+            zmin=0.5,
+            zmax=len(colors) + 0.5,
+            colorscale=colorscale,
+            colorbar=dict(title='Class', tickvals=list(range(1, len(colors) + 1)),
+                          ticktext=list(SUITABILITY_CLASSES)),
+            hovertemplate='<b>%{location}</b><br>%{customdata[0]}<br>Score: %{customdata[1]:.1f}%<extra></extra>'
+        )],
+        frames=frames
+    )
+    
+    fig.update_layout(
+        title_text=frames[0].layout.title.text,
+        title_font_size=20,
+        title_x=0.5,
+        geo=dict(scope='usa', lakecolor='rgb(255, 255, 255)', bgcolor='rgba(0,0,0,0)'),
+        height=700,
+        margin={"r":0,"t":60,"l":0,"b":0},
+        sliders=[dict(active=0, steps=steps, currentvalue=dict(prefix='Month: '),
+                      pad={"t": 10})]
+    )
+    
+    # INDEX.html links here as VIEWER.html?month=YYYY-MM
+    jump_to_month = """
+var month = new URLSearchParams(window.location.search).get('month');
+if (month) {
+    Plotly.animate('{plot_id}', [month], {mode: 'immediate',
+        frame: {duration: 0, redraw: true}, transition: {duration: 0}});
+}
+"""
+    fig.write_html(filename, post_script=jump_to_month, auto_play=False)
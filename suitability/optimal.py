@@ -0,0 +1,363 @@
+"""Optimal maize growing conditions: parameter ranges of the top 10% yields, yield
+correlations, summary tables and figures, and how the ranges move with the yield cut"""
+
+import pandas as pd
+import numpy as np
+import matplotlib.pyplot as plt
+import seaborn as sns
+from scipy import stats
+import warnings
+import os
+
+from .bootstrap import run_bootstrap, weighted_quantiles
+from .input_cache import load_merged
+from .paths import INPUT_CSV, OPTIMAL_DIR
+from .trace import stage
+
+climate_params = ['GS_ppt_total', 'GS_tmean_avg', 'GS_tmin_avg', 'GS_tmax_avg']
+soil_params = ['ph', 'om', 'clay', 'sand', 'aws', 'db']
+all_params = climate_params + soil_params
+
+param_names = {
+    'GS_ppt_total': 'Precipitation (mm)',
+    'GS_tmean_avg': 'Mean Temp (°C)',
+    'GS_tmin_avg': 'Min Temp (°C)',
+    'GS_tmax_avg': 'Max Temp (°C)',
+    'ph': 'pH',
+    'om': 'Organic Matter (%)',
+    'clay': 'Clay (%)',
+    'sand': 'Sand (%)',
+    'aws': 'Water Storage',
+    'db': 'Bulk Density'
+}
+
+def format_interval(low, high, digits):
+    return [f"{a:.{digits}f} - {b:.{digits}f}" for a, b in zip(low, high)]
+
+def optimal_analysis(df):
+    """Yield thresholds, the top 10% rows, per-parameter optimal ranges and county averages"""
+
+    yield_90th = df['Yield'].quantile(0.90)
+    yield_75th = df['Yield'].quantile(0.75)
+    top_10_pct = df[df['Yield'] >= yield_90th].copy()
+
+    optimal_data = []
+    for param in all_params:
+        corr, pval = stats.pearsonr(df[param], df['Yield'])
+        optimal_data.append({
+            'Parameter': param_names[param],
+            'Optimal_Min': top_10_pct[param].quantile(0.25),
+            'Optimal_Max': top_10_pct[param].quantile(0.75),
+            'Ideal': top_10_pct[param].median(),
+            'Overall_Mean': df[param].mean(),
+            'Correlation': corr,
+            'P_Value': pval
+        })
+
+    optimal_df = pd.DataFrame(optimal_data)
+    optimal_df = optimal_df.sort_values('Correlation', key=abs, ascending=False)
+
+    county_avg = df.groupby('FIPS').agg({
+        'Yield': ['mean', 'count'],
+        'GS_ppt_total': 'mean',
+        'GS_tmean_avg': 'mean',
+        'GS_tmin_avg': 'mean',
+        'ph': 'mean',
+        'clay': 'mean',
+        'sand': 'mean'
+    }).round(1)
+
+    county_avg.columns = ['Avg_Yield', 'N_Years', 'Precip', 'Mean_Temp', 'Min_Temp', 'pH', 'Clay', 'Sand']
+    county_avg = county_avg[county_avg['N_Years'] >= 3].sort_values('Avg_Yield', ascending=False)
+
+    return {'yield_90th': yield_90th, 'yield_75th': yield_75th, 'top_10_pct': top_10_pct,
+            'optimal_df': optimal_df, 'county_avg': county_avg}
+
+def write_optimal_tables(df, analysis, bootstrap=0, confidence=0.95, seed=0, workers=1):
+    """Write TABLE1-4 (and the CI tables if bootstrap > 0); returns them keyed by workbook sheet"""
+
+    yield_90th, yield_75th = analysis['yield_90th'], analysis['yield_75th']
+    top_10_pct, optimal_df, county_avg = analysis['top_10_pct'], analysis['optimal_df'], analysis['county_avg']
+
+    os.makedirs(OPTIMAL_DIR, exist_ok=True)
+
+    # TABLE 1: Optimal Ranges Summary
+    table1 = optimal_df.copy()
+    table1['Optimal_Range'] = table1.apply(
+        lambda x: f"{x['Optimal_Min']:.1f} - {x['Optimal_Max']:.1f}", axis=1
+    )
+    table1['Ideal'] = table1['Ideal'].round(1)
+    table1['Correlation'] = table1['Correlation'].round(3)
+    table1_display = table1[['Parameter', 'Optimal_Range', 'Ideal', 'Correlation']]
+    table1_display.to_csv(f'{OPTIMAL_DIR}/TABLE1_optimal_ranges.csv', index=False)
+
+    # TABLE 2: Top 20 Counties
+    table2 = county_avg.head(20).reset_index()
+    table2.to_csv(f'{OPTIMAL_DIR}/TABLE2_top_counties.csv', index=False)
+
+    # TABLE 3: Correlation Ranking
+    table3 = optimal_df[['Parameter', 'Correlation', 'P_Value']].copy()
+    table3['Significance'] = table3['P_Value'].apply(
+        lambda p: '***' if p < 0.001 else '**' if p < 0.01 else '*' if p < 0.05 else ''
+    )
+    table3['Correlation'] = table3['Correlation'].round(3)
+    table3['P_Value'] = table3['P_Value'].apply(lambda x: f"{x:.6f}")
+    table3.to_csv(f'{OPTIMAL_DIR}/TABLE3_correlations.csv', index=False)
+
+    if bootstrap > 0:
+        print(f"Bootstrapping {bootstrap} resamples...")
+        # Rows follow optimal_df, which is already sorted by |Correlation|
+        params = [all_params[i] for i in optimal_df.index]
+        with stage('bootstrap', resamples=bootstrap, rows=len(df), workers=workers):
+            quartiles, correlations = run_bootstrap(df[params].to_numpy(dtype=np.float64),
+                                                    df['Yield'].to_numpy(dtype=np.float64),
+                                                    bootstrap, seed, workers)
+        tail = (1 - confidence) / 2 * 100
+        q_low, q_high = np.nanpercentile(quartiles, [tail, 100 - tail], axis=0)
+        r_low, r_high = np.nanpercentile(correlations, [tail, 100 - tail], axis=0)
+
+        table1_ci = pd.DataFrame({
+            'Parameter': optimal_df['Parameter'].to_numpy(),
+            'Optimal_Min': optimal_df['Optimal_Min'].round(1).to_numpy(),
+            'Optimal_Min_CI': format_interval(q_low[:, 0], q_high[:, 0], 1),
+            'Optimal_Max': optimal_df['Optimal_Max'].round(1).to_numpy(),
+            'Optimal_Max_CI': format_interval(q_low[:, 2], q_high[:, 2], 1),
+            'Ideal': optimal_df['Ideal'].round(1).to_numpy(),
+            'Ideal_CI': format_interval(q_low[:, 1], q_high[:, 1], 1),
+            'Correlation': optimal_df['Correlation'].round(3).to_numpy(),
+            'Correlation_CI': format_interval(r_low, r_high, 3)
+        })
+        table1_ci.to_csv(f'{OPTIMAL_DIR}/TABLE1_optimal_ranges_CI.csv', index=False)
+
+        table3_ci = table3[['Parameter', 'Correlation']].copy()
+        table3_ci['CI_Low'] = r_low.round(3)
+        table3_ci['CI_High'] = r_high.round(3)
+        table3_ci['Bootstrap_SE'] = np.nanstd(correlations, axis=0, ddof=1).round(4)
+        table3_ci['Significance'] = table3['Significance']
+        table3_ci.to_csv(f'{OPTIMAL_DIR}/TABLE3_correlations_CI.csv', index=False)
+
+    # TABLE 4: Summary Statistics
+    summary_stats = pd.DataFrame({
+        'Metric': [
+            'Total Observations',
+            'Unique Counties',
+            'Years Covered',
+            'Mean Yield (bu/acre)',
+            'Top 10% Threshold (bu/acre)',
+            'Top 25% Threshold (bu/acre)',
+            'Best County (FIPS)',
+            'Best County Avg Yield',
+            'Optimal Mean Temp (°C)',
+            'Optimal Min Temp (°C)',
+            'Optimal Precipitation (mm)',
+            'Optimal Clay (%)',
+            'Optimal Sand (%)',
+            'Optimal pH'
+        ],
+        'Value': [
+            len(df),
+            df['FIPS'].nunique(),
+            f"{df['Year'].min()}-{df['Year'].max()}",
+            f"{df['Yield'].mean():.1f}",
+            f"{yield_90th:.1f}",
+            f"{yield_75th:.1f}",
+            county_avg.index[0],
+            f"{county_avg.iloc[0]['Avg_Yield']:.1f}",
+            f"{top_10_pct['GS_tmean_avg'].median():.1f}",
+            f"{top_10_pct['GS_tmin_avg'].median():.1f}",
+            f"{top_10_pct['GS_ppt_total'].median():.0f}",
+            f"{top_10_pct['clay'].median():.1f}",
+            f"{top_10_pct['sand'].median():.1f}",
+            f"{top_10_pct['ph'].median():.1f}"
+        ]
+    })
+    summary_stats.to_csv(f'{OPTIMAL_DIR}/TABLE4_summary.csv', index=False)
+
+    sheets = {'Optimal Ranges': table1_display, 'Top Counties': table2, 'Correlations': table3,
+              'Summary': summary_stats, 'Full Data': optimal_df}
+    if bootstrap > 0:
+        sheets.update({'Optimal Ranges CI': table1_ci, 'Correlations CI': table3_ci})
+    return sheets
+
+def write_optimal_figures(df, analysis):
+    """Write FIG1-3 (dpi=300 PNGs)"""
+
+    yield_90th, yield_75th = analysis['yield_90th'], analysis['yield_75th']
+    top_10_pct, optimal_df = analysis['top_10_pct'], analysis['optimal_df']
+
+    # FIGURE 1: Yield Distribution
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.hist(df['Yield'], bins=50, color='steelblue', alpha=0.7, edgecolor='black')
+    ax.axvline(yield_90th, color='red', linestyle='--', linewidth=2, label=f'Top 10% (≥{yield_90th:.1f})')
+    ax.axvline(yield_75th, color='orange', linestyle='--', linewidth=2, label=f'Top 25% (≥{yield_75th:.1f})')
+    ax.axvline(df['Yield'].mean(), color='green', linestyle='--', linewidth=2, label=f'Mean ({df["Yield"].mean():.1f})')
+    ax.set_xlabel('Yield (bu/acre)', fontsize=13, fontweight='bold')
+    ax.set_ylabel('Frequency', fontsize=13, fontweight='bold')
+    ax.set_title('Maize Yield Distribution (2020-2024)', fontsize=16, fontweight='bold')
+    ax.legend(fontsize=11)
+    ax.grid(alpha=0.3)
+    plt.tight_layout()
+    with stage('savefig', file='FIG1_yield_distribution.png'):
+        plt.savefig(f'{OPTIMAL_DIR}/FIG1_yield_distribution.png', dpi=300, bbox_inches='tight')
+    plt.close()
+
+    # FIGURE 2: Top vs All Box Plots
+    fig, axes = plt.subplots(2, 5, figsize=(20, 10))
+    fig.suptitle('Parameter Distributions: Top 10% vs All Data', fontsize=18, fontweight='bold')
+
+    for idx, param in enumerate(all_params):
+        ax = axes[idx // 5, idx % 5]
+        data_to_plot = [df[param], top_10_pct[param]]
+        bp = ax.boxplot(data_to_plot, labels=['All Data', 'Top 10%'], patch_artist=True)
+        bp['boxes'][0].set_facecolor('lightblue')
+        bp['boxes'][1].set_facecolor('lightgreen')
+        ax.set_ylabel(param_names[param], fontsize=10, fontweight='bold')
+        ax.grid(axis='y', alpha=0.3)
+
+    plt.tight_layout()
+    with stage('savefig', file='FIG2_top_vs_all_boxplots.png'):
+        plt.savefig(f'{OPTIMAL_DIR}/FIG2_top_vs_all_boxplots.png', dpi=300, bbox_inches='tight')
+    plt.close()
+
+    # FIGURE 3: Correlation Bar Chart
+    fig, ax = plt.subplots(figsize=(10, 8))
+    colors = ['red' if x < 0 else 'green' for x in optimal_df['Correlation']]
+    y_pos = np.arange(len(optimal_df))
+    ax.barh(y_pos, optimal_df['Correlation'], color=colors, alpha=0.7)
+    ax.set_yticks(y_pos)
+    ax.set_yticklabels(optimal_df['Parameter'])
+    ax.axvline(0, color='black', linewidth=1)
+    ax.set_xlabel('Correlation with Yield', fontsize=13, fontweight='bold')
+    ax.set_title('Parameter Correlations with Maize Yield', fontsize=16, fontweight='bold')
+    ax.grid(axis='x', alpha=0.3)
+    plt.tight_layout()
+    with stage('savefig', file='FIG3_correlation_chart.png'):
+        plt.savefig(f'{OPTIMAL_DIR}/FIG3_correlation_chart.png', dpi=300, bbox_inches='tight')
+    plt.close()
+
+def threshold_sweep(df, percentiles):
+    """Optimal ranges of the top-yield rows for every yield percentile in percentiles
+
+    Long format, one row per percentile and parameter, with the same quartiles TABLE1
+    takes from df[df['Yield'] >= threshold] at the 90th percentile. Rows are sorted by
+    yield once. Every top subset is then a suffix of that order, so membership of all
+    the nested subsets is a comparison of each row's yield rank with the suffix start.
+    The quartiles of all subsets come from one cumulative count per parameter, and the
+    subset means from one suffix sum.
+    """
+
+    yields = df['Yield'].to_numpy(dtype=np.float64)
+    order = np.argsort(yields, kind='stable')
+    sorted_yields = yields[order]
+    n = len(yields)
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n)
+
+    # Linear-interpolated thresholds (as Series.quantile) read off the sorted yields
+    position = np.asarray(percentiles, dtype=np.float64) / 100 * (n - 1)
+    below = np.floor(position).astype(np.int64)
+    above = np.minimum(below + 1, n - 1)
+    thresholds = sorted_yields[below] + (position - below) * (sorted_yields[above] - sorted_yields[below])
+    starts = np.searchsorted(sorted_yields, thresholds, side='left')
+    top_rows = n - starts
+
+    frames = []
+    for param in all_params:
+        values = df[param].to_numpy(dtype=np.float64)
+        by_value = np.argsort(values, kind='stable')
+        members = rank[by_value] >= starts[:, None]
+        quartiles = weighted_quantiles(values[by_value], members, [0.25, 0.50, 0.75])
+        suffix_sums = np.cumsum(values[order][::-1])[::-1]
+        frames.append(pd.DataFrame({
+            'Percentile': percentiles,
+            'Yield_Threshold': thresholds,
+            'Top_Rows': top_rows,
+            'Parameter': param_names[param],
+            'Optimal_Min': quartiles[:, 0],
+            'Ideal': quartiles[:, 1],
+            'Optimal_Max': quartiles[:, 2],
+            'Top_Mean': suffix_sums[starts] / top_rows,
+            'Overall_Mean': values.mean()
+        }))
+    sweep = pd.concat(frames, ignore_index=True)
+    return sweep.sort_values('Percentile', kind='stable', ignore_index=True)
+
+def write_sweep_figure(sweep, path):
+    """Optimal range band, ideal value and overall mean of each parameter against the yield percentile"""
+
+    fig, axes = plt.subplots(2, 5, figsize=(20, 10), sharex=True)
+    fig.suptitle('Optimal Ranges vs Top-Yield Threshold', fontsize=18, fontweight='bold')
+
+    for idx, param in enumerate(all_params):
+        ax = axes[idx // 5, idx % 5]
+        rows = sweep[sweep['Parameter'] == param_names[param]]
+        ax.fill_between(rows['Percentile'], rows['Optimal_Min'], rows['Optimal_Max'],
+                        color='lightgreen', alpha=0.6, label='Optimal range (IQR)')
+        ax.plot(rows['Percentile'], rows['Ideal'], color='darkgreen', linewidth=2, label='Ideal (median)')
+        ax.axhline(rows['Overall_Mean'].iloc[0], color='gray', linestyle='--', linewidth=1, label='Overall mean')
+        ax.axvline(90, color='red', linestyle=':', linewidth=1)
+        ax.set_ylabel(param_names[param], fontsize=10, fontweight='bold')
+        if idx >= 5:
+            ax.set_xlabel('Yield percentile', fontsize=10)
+        ax.grid(alpha=0.3)
+    axes[0, 0].legend(fontsize=8)
+
+    plt.tight_layout()
+    with stage('savefig', file=os.path.basename(path)):
+        plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close()
+
+def write_workbook(sheets):
+    """COMPLETE_RESULTS.xlsx with one sheet per table; skipped without openpyxl"""
+
+    try:
+        with pd.ExcelWriter(f'{OPTIMAL_DIR}/COMPLETE_RESULTS.xlsx', engine='openpyxl') as writer:
+            for name, table in sheets.items():
+                table.to_excel(writer, sheet_name=name, index=False)
+    except ImportError:
+        pass
+
+def run_optimal(bootstrap=0, confidence=0.95, seed=0, workers=1):
+    """Write TABLE1-4, FIG1-3 and COMPLETE_RESULTS.xlsx to OPTIMAL_DIR
+
+    bootstrap > 0 also writes confidence intervals from that many resamples.
+    """
+
+    warnings.filterwarnings('ignore')
+    sns.set_style("whitegrid")
+
+    print("Loading data...")
+    with stage('load', source=INPUT_CSV) as span:
+        df = load_merged(INPUT_CSV)
+        span.set(rows=len(df))
+    with stage('analysis', rows=len(df)):
+        analysis = optimal_analysis(df)
+
+    with stage('tables', rows=len(df)):
+        sheets = write_optimal_tables(df, analysis, bootstrap, confidence, seed, workers)
+    with stage('figures', rows=len(df)):
+        write_optimal_figures(df, analysis)
+    with stage('workbook'):
+        write_workbook(sheets)
+
+    print(f"\nDone; Outputs saved to: {OPTIMAL_DIR}/")
+
+def run_threshold_sweep(percentiles):
+    """Write TABLE5_threshold_sensitivity.csv and FIG4_threshold_sensitivity.png to OPTIMAL_DIR"""
+
+    warnings.filterwarnings('ignore')
+    sns.set_style("whitegrid")
+
+    print("Loading data...")
+    with stage('load', source=INPUT_CSV) as span:
+        df = load_merged(INPUT_CSV)
+        span.set(rows=len(df))
+    with stage('sweep', rows=len(df), percentiles=len(percentiles)):
+        sweep = threshold_sweep(df, percentiles)
+
+    os.makedirs(OPTIMAL_DIR, exist_ok=True)
+    sweep.round(3).to_csv(f'{OPTIMAL_DIR}/TABLE5_threshold_sensitivity.csv', index=False)
+    with stage('figures', rows=len(sweep)):
+        write_sweep_figure(sweep, f'{OPTIMAL_DIR}/FIG4_threshold_sensitivity.png')
+
+    print(f"\nDone; {len(percentiles)} yield percentiles swept, outputs saved to: {OPTIMAL_DIR}/")
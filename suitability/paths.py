@@ -0,0 +1,57 @@
+"""Input and output locations, relative to the repository root"""
+
+from datetime import datetime
+
+INPUT_CSV = 'inputs/TotalMerged.csv'
+CACHE_DIR = 'inputs/.cache'
+COUNTY_GEOJSON_PATH = f'{CACHE_DIR}/geojson-counties-fips.json'
+
+COUNTY_GEOJSON_URL = "https://raw.githubusercontent.com/plotly/datasets/master/geojson-counties-fips.json"
+
+OUTPUT_DIR = 'outputs/monthly_suitability'
+DATA_DIR = f'{OUTPUT_DIR}/data'
+MAPS_DIR = f'{OUTPUT_DIR}/maps'
+PNG_DIR = f'{OUTPUT_DIR}/png'
+SUMMARY_DIR = f'{OUTPUT_DIR}/summary'
+SCENARIOS_DIR = f'{OUTPUT_DIR}/scenarios'
+SHARDS_DIR = f'{OUTPUT_DIR}/shards'
+WINDOWS_DIR = f'{OUTPUT_DIR}/windows'
+SPATIAL_DIR = f'{OUTPUT_DIR}/spatial'
+RESULT_STORE_PATH = f'{OUTPUT_DIR}/store'
+MANIFEST_PATH = f'{OUTPUT_DIR}/manifest.json'
+INDEX_PATH = f'{OUTPUT_DIR}/INDEX.html'
+VIEWER_PATH = f'{OUTPUT_DIR}/VIEWER.html'
+
+SUMMARY_FILES = [
+    f'{SUMMARY_DIR}/percentage_trends.png',
+    f'{SUMMARY_DIR}/average_score_trends.png',
+    f'{SUMMARY_DIR}/county_count_trends.png',
+    f'{SUMMARY_DIR}/seasonal_comparison.png',
+    f'{SUMMARY_DIR}/monthly_statistics.csv',
+    f'{SUMMARY_DIR}/SUMMARY_REPORT.txt',
+    INDEX_PATH
+]
+
+OPTIMAL_DIR = 'outputs/optimal_conditions'
+
+BENCHMARK_DIR = 'outputs/benchmarks'
+
+def month_name(year, month):
+    return datetime(year, month, 1).strftime('%B')
+
+def month_csv_path(year, month):
+    return f"{DATA_DIR}/{year}_{month:02d}_classified.csv"
+
+def month_map_name(year, month, maps):
+    """Per-month map file relative to OUTPUT_DIR for --maps monthly/png; None for the slider"""
+    if maps == 'monthly':
+        return f"maps/{year}_{month:02d}_{month_name(year, month)}.html"
+    if maps == 'png':
+        return f"png/{year}_{month:02d}_{month_name(year, month)}.png"
+    return None
+
+def month_map_path(year, month, maps):
+    name = month_map_name(year, month, maps)
+    if name is None:
+        return None
+    return f"{OUTPUT_DIR}/{name}"
@@ -0,0 +1,428 @@
+"""Classification runs over the merged input: in-memory, streamed and incremental
+
+Plotting modules (plotly, matplotlib, Pillow) are imported inside the functions that
+render maps or charts, so classification alone only loads numpy and pandas.
+"""
+
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import multiprocessing
+import hashlib
+import itertools
+import json
+import os
+import re
+
+from .classify import (classify_suitability_batch, partition_by_month, month_partials,
+                       add_month_partials, finalize_month_stats, summarize_months)
+from .input_cache import load_merged, file_sha256
+from .paths import (INPUT_CSV, DATA_DIR, MAPS_DIR, PNG_DIR, SUMMARY_DIR, RESULT_STORE_PATH,
+                    MANIFEST_PATH, VIEWER_PATH, SUMMARY_FILES, month_name, month_csv_path,
+                    month_map_path)
+from .result_store import (build_result_matrices, empty_store, write_result_store, store_files,
+                           open_result_store, month_labels, VALUE_COLUMNS)
+from . import trace
+from .trace import stage
+from .writer import INLINE, output_writer
+
+MONTH_CSV_PATTERN = re.compile(r'^(\d{4})_(\d{2})_classified\.csv$')
+
+def make_output_dirs(maps):
+    for path in (DATA_DIR, SUMMARY_DIR, MAPS_DIR) + ((PNG_DIR,) if maps == 'png' else ()):
+        os.makedirs(path, exist_ok=True)
+
+def load_classified(csv_path=INPUT_CSV):
+    """Classified input sorted by month, its (year, month) -> row slice map and the input columns"""
+
+    with stage('load', source=csv_path) as span:
+        df = load_merged(csv_path, padded_fips=True)
+        span.set(rows=len(df))
+    input_columns = list(df.columns)
+    with stage('classify', rows=len(df)):
+        df[['Suitability_Class', 'Suitability_Code', 'Suitability_Score']] = classify_suitability_batch(df)
+    with stage('partition', rows=len(df)):
+        df, month_slices = partition_by_month(df)
+    return df, month_slices, input_columns
+
+def _write_html(fig, filename):
+    with stage('write_html'):
+        fig.write_html(filename)
+
+def _write_csv(df_month, filename):
+    with stage('write_csv', rows=len(df_month)):
+        df_month.to_csv(filename, index=False)
+
+def render_month(df_month, year, month, maps, writer=INLINE):
+    """Write one month's map for --maps monthly/png (the slider viewer is written separately)
+
+    The monthly figure is built here and its HTML written by writer.
+    """
+
+    filename = month_map_path(year, month, maps)
+    if maps == 'monthly':
+        from .maps import month_map_figure
+        with stage('map', maps=maps, rows=len(df_month)):
+            fig = month_map_figure(df_month, year, month_name(year, month))
+        writer.submit(_write_html, fig, filename)
+    elif maps == 'png':
+        from .static_maps import render_month_png
+        with stage('map', maps=maps, rows=len(df_month)):
+            render_month_png(df_month['FIPS'].to_numpy(dtype='U5'), df_month['Suitability_Code'].to_numpy(),
+                             year, month_name(year, month), filename)
+
+def prepare_renderer(maps):
+    """Import the map backend and load the map geometry or PNG raster once, before any workers fork"""
+
+    with stage('prepare_renderer', maps=maps):
+        if maps in ('monthly', 'slider'):
+            from .maps import map_geometry  # plotly imports once here, not in every worker
+            map_geometry()
+        elif maps == 'png':
+            from .static_maps import default_raster
+            default_raster()
+
+def read_month_csv(year, month, columns=None):
+    """One month's classified rows; floats use the round-trip parser, so they equal what run wrote"""
+    return pd.read_csv(month_csv_path(year, month), usecols=columns, dtype={'FIPS': str},
+                       float_precision='round_trip')
+
+def months_on_disk():
+    """(year, month) of every classified CSV in DATA_DIR, in order"""
+
+    if not os.path.isdir(DATA_DIR):
+        return []
+    matches = (MONTH_CSV_PATTERN.match(name) for name in os.listdir(DATA_DIR))
+    return sorted((int(match[1]), int(match[2])) for match in matches if match)
+
+# Forked workers inherit this instead of receiving the frame with every job. 'writer' is
+# the background writer of a serial run; forked workers write inline.
+_shared = {}
+
+def _write_csv_month_job(year, month):
+    df_month = _shared['df'].iloc[_shared['month_slices'][(year, month)]]
+    with stage('month_csv', month=f"{year}-{month:02d}", rows=len(df_month)):
+        _shared['writer'].submit(_write_csv, df_month, month_csv_path(year, month))
+
+def _render_month_job(year, month):
+    df_month = _shared['df'].iloc[_shared['month_slices'][(year, month)]]
+    with stage('month', month=f"{year}-{month:02d}", rows=len(df_month)):
+        render_month(df_month, year, month, _shared['maps'], _shared['writer'])
+
+def _render_csv_month_job(year, month):
+    with stage('month', month=f"{year}-{month:02d}") as span:
+        with stage('read_csv') as read_span:
+            df_month = read_month_csv(year, month)
+            read_span.set(rows=len(df_month))
+        span.set(rows=len(df_month))
+        render_month(df_month, year, month, _shared['maps'], _shared['writer'])
+
+def run_month_jobs(job, month_keys, workers):
+    """Run job(year, month) for every key, in a fork-based process pool if workers > 1"""
+
+    if workers > 1 and 'fork' not in multiprocessing.get_all_start_methods():
+        print("--workers needs the 'fork' start method; writing months serially")
+        workers = 1
+
+    if workers > 1:
+        # Writer threads do not survive a fork
+        _shared['writer'] = INLINE
+        years, months = [year for year, _ in month_keys], [month for _, month in month_keys]
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=multiprocessing.get_context('fork')) as pool:
+            if trace.enabled():
+                # Workers record spans in their own copy of the trace; merge them back here
+                for events in pool.map(partial(trace.collect, job), years, months):
+                    trace.extend(events)
+            else:
+                list(pool.map(job, years, months))
+    else:
+        for year, month in month_keys:
+            job(year, month)
+
+def result_store_from_csvs(month_keys):
+    """Result store built from the per-month CSVs, reading one month at a time"""
+
+    fips_index = np.unique(np.concatenate([
+        read_month_csv(year, month, ['FIPS'])['FIPS'].unique() for year, month in month_keys
+    ]).astype('U5'))
+    variables = [name for name in VALUE_COLUMNS
+                 if name in pd.read_csv(month_csv_path(*month_keys[0]), nrows=0).columns]
+    store = empty_store(fips_index, month_labels(*zip(*month_keys)), variables)
+
+    for j, (year, month) in enumerate(month_keys):
+        month_df = read_month_csv(year, month, ['FIPS', 'Suitability_Code', 'Suitability_Score'] + variables)
+        rows = np.searchsorted(fips_index, month_df['FIPS'].to_numpy(dtype='U5'))
+        store['codes'][rows, j] = month_df['Suitability_Code'].to_numpy()
+        store['scores'][rows, j] = month_df['Suitability_Score'].to_numpy()
+        store['values'][rows, j] = month_df[variables].to_numpy(dtype=np.float32)
+
+    return store
+
+def stats_from_csvs(month_keys):
+    """monthly statistics from the per-month CSVs; read_month_csv round-trips floats, so they match the run"""
+
+    partials = None
+    for year, month in month_keys:
+        month_df = read_month_csv(year, month, ['Year', 'Month', 'Suitability_Code', 'Suitability_Score'])
+        partials = add_month_partials(partials, month_partials(month_df))
+    return finalize_month_stats(partials)
+
+def stream_classify(csv_path, chunk_rows):
+    """Classify the input chunk by chunk, appending each month's rows to its classified CSV
+
+    Only one chunk is in memory at a time; monthly counts and score sums are accumulated
+    online, so the returned stats match an in-memory run.
+    """
+
+    columns = pd.read_csv(csv_path, nrows=0).columns
+    dtypes = {name: np.float64 for name in columns if name not in ('FIPS', 'Year', 'Month')}
+    dtypes['FIPS'] = str
+
+    partials = None
+    started = set()
+    reader = iter(pd.read_csv(csv_path, chunksize=chunk_rows, dtype=dtypes))
+    for i in itertools.count():
+        with stage('read_chunk', chunk=i + 1) as span:
+            chunk = next(reader, None)
+            span.set(rows=0 if chunk is None else len(chunk))
+        if chunk is None:
+            break
+
+        with stage('chunk', chunk=i + 1, rows=len(chunk)):
+            chunk['FIPS'] = chunk['FIPS'].str.zfill(5)
+            with stage('classify', rows=len(chunk)):
+                chunk[['Suitability_Class', 'Suitability_Code', 'Suitability_Score']] = \
+                    classify_suitability_batch(chunk)
+            chunk, chunk_slices = partition_by_month(chunk)
+
+            with stage('write_csv', rows=len(chunk)):
+                for (year, month), rows in chunk_slices.items():
+                    first = (year, month) not in started
+                    chunk.iloc[rows].to_csv(month_csv_path(year, month), mode='w' if first else 'a',
+                                            header=first, index=False)
+                    started.add((year, month))
+
+            partials = add_month_partials(partials, month_partials(chunk))
+        print(f"  chunk {i + 1}: {len(chunk)} rows, {len(started)} months so far")
+
+    return finalize_month_stats(partials)
+
+def write_summary(stats_df, maps, writer=INLINE):
+    from .summary import write_summary_outputs, write_index_html
+
+    print("Creating summary analysis...")
+    with stage('summary', months=len(stats_df)):
+        stats_df = write_summary_outputs(stats_df, writer)
+    with stage('index'):
+        write_index_html(stats_df, maps)
+    return stats_df
+
+def partition_hash(df_month, input_columns):
+    """Content hash of one month's input rows (column names, values and row order)"""
+
+    digest = hashlib.sha256('\x1f'.join(input_columns).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df_month[input_columns], index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def artifacts_intact(recorded, paths):
+    """True if every path exists and still has the hash recorded in the manifest"""
+
+    return all(path in recorded and os.path.exists(path) and file_sha256(path) == recorded[path]
+               for path in paths)
+
+def code_hash():
+    """Hash of the package sources; any code change may change any output"""
+
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(package_dir)):
+        if name.endswith('.py'):
+            digest.update(name.encode('utf-8'))
+            digest.update(file_sha256(os.path.join(package_dir, name)).encode('ascii'))
+    return digest.hexdigest()
+
+def month_artifacts(year, month, maps):
+    """Output files written for one month"""
+
+    artifacts = [month_csv_path(year, month)]
+    if maps in ('monthly', 'png'):
+        artifacts.append(month_map_path(year, month, maps))
+    return artifacts
+
+def run_stream(maps, chunk_rows, writer_threads=0):
+    """--stream: classify in chunks, then render maps and summaries from the finished CSVs"""
+
+    print(f"Streaming monthly data in chunks of {chunk_rows} rows...")
+    stats_df = stream_classify(INPUT_CSV, chunk_rows)
+    month_keys = list(zip(stats_df['Year'], stats_df['Month']))
+
+    with output_writer(writer_threads) as writer:
+        stats_df = write_summary(stats_df, maps, writer)
+        with stage('result_store', months=len(month_keys)):
+            write_result_store(RESULT_STORE_PATH, result_store_from_csvs(month_keys))
+
+        # Maps need a whole month, so they are rendered from the finished CSVs one month at a time
+        prepare_renderer(maps)
+        _shared.update(maps=maps, writer=writer)
+        for year, month in month_keys:
+            _render_csv_month_job(year, month)
+    return stats_df
+
+def run_pipeline(maps='monthly', workers=1, incremental=False, writer_threads=0):
+    """Classify, write per-month CSVs and maps, summaries, result store and manifest
+
+    With incremental=True only months whose input rows or outputs changed since the last
+    run (per MANIFEST_PATH) are rewritten. Returns the monthly stats, or None if nothing
+    needed rebuilding. writer_threads > 0 writes maps, CSVs and charts in that many
+    background threads while the next month is computed.
+    """
+
+    print("Loading monthly data...")
+    df, month_slices, input_columns = load_classified()
+    with stage('aggregate', rows=len(df)):
+        stats_df = summarize_months(df)
+
+    summary_artifacts = SUMMARY_FILES + store_files(RESULT_STORE_PATH)
+    if maps == 'slider':
+        summary_artifacts.append(VIEWER_PATH)
+
+    with stage('hash', rows=len(df)):
+        current_code = code_hash()
+        input_hashes = {key: partition_hash(df.iloc[rows], input_columns) for key, rows in month_slices.items()}
+
+    previous = {'months': {}, 'summary': {}}
+    if incremental and os.path.exists(MANIFEST_PATH):
+        with open(MANIFEST_PATH, encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('code_sha256') == current_code:
+            previous = manifest
+
+    month_keys = []
+    for year, month in month_slices:
+        entry = previous['months'].get(f"{year}-{month:02d}")
+        if (entry is None or entry['input_sha256'] != input_hashes[(year, month)]
+                or not artifacts_intact(entry['outputs'], month_artifacts(year, month, maps))):
+            month_keys.append((year, month))
+
+    if incremental:
+        if not month_keys and previous['months'].keys() == {f"{y}-{m:02d}" for y, m in month_slices} \
+                and artifacts_intact(previous['summary'], summary_artifacts):
+            print("All months up to date; nothing to rebuild")
+            return None
+        print(f"Rebuilding {len(month_keys)} of {len(month_slices)} months")
+
+    with output_writer(writer_threads) as writer:
+        _shared.update(df=df, month_slices=month_slices, maps=maps, writer=writer)
+        with stage('month_csvs', months=len(month_keys), workers=workers):
+            run_month_jobs(_write_csv_month_job, month_keys, workers)
+        stats_df = write_summary(stats_df, maps, writer)
+        with stage('result_store', rows=len(df)):
+            write_result_store(RESULT_STORE_PATH, build_result_matrices(df))
+        with stage('flush'):
+            writer.flush()
+
+        # Maps last, in a second pass: their geometry may need downloading, and nothing
+        # above depends on it
+        print("Generating monthly suitability maps...")
+        prepare_renderer(maps)
+        _shared['writer'] = writer
+        with stage('months', months=len(month_keys), workers=workers):
+            run_month_jobs(_render_month_job, month_keys, workers)
+
+        if maps == 'slider':
+            from .maps import write_slider_viewer
+            with stage('slider', rows=len(df)):
+                write_slider_viewer(df, month_slices, VIEWER_PATH)
+
+    # Record input and output hashes so incremental runs can skip unchanged months next time
+    rebuilt = set(month_keys)
+    with stage('manifest', months=len(month_slices)):
+        manifest = {'code_sha256': current_code, 'months': {}, 'summary': {}}
+        for year, month in month_slices:
+            key = f"{year}-{month:02d}"
+            if (year, month) in rebuilt or key not in previous['months']:
+                outputs = {path: file_sha256(path) for path in month_artifacts(year, month, maps)}
+            else:
+                outputs = previous['months'][key]['outputs']
+            manifest['months'][key] = {'input_sha256': input_hashes[(year, month)], 'outputs': outputs}
+        manifest['summary'] = {path: file_sha256(path) for path in summary_artifacts}
+
+        with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1)
+    return stats_df
+
+def run_classify(writer_threads=0):
+    """Classification only: per-month CSVs and the result store, no maps or charts"""
+
+    print("Loading monthly data...")
+    df, month_slices, _ = load_classified()
+    with output_writer(writer_threads) as writer:
+        for (year, month), rows in month_slices.items():
+            writer.submit(_write_csv, df.iloc[rows], month_csv_path(year, month))
+        with stage('result_store', rows=len(df)):
+            write_result_store(RESULT_STORE_PATH, build_result_matrices(df))
+    return month_slices
+
+def run_maps(maps, workers=1, writer_threads=0):
+    """Render maps from the outputs of a previous classify run"""
+
+    month_keys = months_on_disk()
+    if not month_keys:
+        raise FileNotFoundError(f"No classified months in {DATA_DIR}; run the classify command first")
+
+    if maps == 'slider':
+        from .maps import write_slider_viewer
+        prepare_renderer(maps)
+        with stage('read_csv', months=len(month_keys)):
+            data, month_slices = partition_by_month(pd.concat(
+                [read_month_csv(year, month) for year, month in month_keys], ignore_index=True))
+        with stage('slider', rows=len(data)):
+            write_slider_viewer(data, month_slices, VIEWER_PATH)
+    elif maps == 'png':
+        # Codes straight from the result store; no CSV parsing needed
+        from .static_maps import render_month_png
+        store = open_result_store(RESULT_STORE_PATH)
+        for j, label in enumerate(store['months']):
+            year, month = int(label[:4]), int(label[5:])
+            with stage('map', maps=maps, month=label, rows=len(store['fips'])):
+                render_month_png(store['fips'], store['codes'][:, j], year, month_name(year, month),
+                                 month_map_path(year, month, maps))
+    else:
+        prepare_renderer(maps)
+        with output_writer(writer_threads) as writer:
+            _shared.update(maps=maps, writer=writer)
+            run_month_jobs(_render_csv_month_job, month_keys, workers)
+    return month_keys
+
+def run_summary(maps, writer_threads=0):
+    """Summary charts, report and INDEX.html from the outputs of a previous classify run"""
+
+    month_keys = months_on_disk()
+    if not month_keys:
+        raise FileNotFoundError(f"No classified months in {DATA_DIR}; run the classify command first")
+    with stage('read_csv', months=len(month_keys)):
+        stats_df = stats_from_csvs(month_keys)
+    with output_writer(writer_threads) as writer:
+        return write_summary(stats_df, maps, writer)
+
+def run_cube(maps):
+    """Classify from the dense county x month cube; write statistics, charts, report, INDEX
+    and the result store, but no per-month CSVs"""
+
+    from .cube import load_cube, classify_cube, cube_month_stats, cube_result_store, cube_nbytes
+
+    print("Loading monthly data into the county x month cube...")
+    with stage('load_cube', source=INPUT_CSV) as span:
+        cube = load_cube(INPUT_CSV)
+        span.set(rows=int(cube['present'].sum()), cube_mb=round(cube_nbytes(cube) / 2 ** 20, 1))
+    with stage('classify', rows=int(cube['present'].sum())):
+        codes, scores = classify_cube(cube)
+    with stage('aggregate'):
+        stats_df = cube_month_stats(cube, codes, scores)
+
+    stats_df = write_summary(stats_df, maps)
+    with stage('result_store'):
+        write_result_store(RESULT_STORE_PATH, cube_result_store(cube, codes, scores))
+    return stats_df
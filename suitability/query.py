@@ -0,0 +1,199 @@
+"""Indexed queries over the monthly suitability result store, as functions and a local HTTP endpoint"""
+
+import numpy as np
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import json
+import re
+
+from .paths import RESULT_STORE_PATH
+from .result_store import open_result_store, CLASS_LABELS
+
+MONTH_PATTERN = re.compile(r'^\d{4}-\d{2}$')
+FIPS_PATTERN = re.compile(r'^\d{1,5}$')
+STATE_PATTERN = re.compile(r'^\d{1,2}$')
+
+def build_state_index(store):
+    """State FIPS prefix -> (start, stop) rows; the sorted FIPS axis keeps each state contiguous"""
+    states, starts = np.unique(store['fips'].astype('U2'), return_index=True)
+    stops = np.r_[starts[1:], len(store['fips'])]
+    return {state: (start, stop) for state, start, stop in zip(states, starts, stops)}
+
+def open_query_store(path=RESULT_STORE_PATH):
+    """Result store plus the state index used by query()"""
+    store = open_result_store(path)
+    store['state_index'] = build_state_index(store)
+    return store
+
+def _month_bounds(store, start, end):
+    for label in (start, end):
+        if label is not None and not MONTH_PATTERN.match(label):
+            raise ValueError(f"Months must look like YYYY-MM, got {label!r}")
+    first = 0 if start is None else np.searchsorted(store['months'], start, side='left')
+    stop = len(store['months']) if end is None else np.searchsorted(store['months'], end, side='right')
+    return first, max(first, stop)
+
+def _codes(codes, pattern, width, what):
+    """Codes as zero-padded strings; raises ValueError for anything but 1 to width digits"""
+    padded = []
+    for code in codes:
+        code = str(code)
+        if not pattern.match(code):
+            raise ValueError(f"{what} codes must be 1 to {width} digits, got {code!r}")
+        padded.append(code.zfill(width))
+    return padded
+
+def query(store, fips=None, states=None, start=None, end=None):
+    """Class, score and criterion values for counties over an inclusive YYYY-MM range
+
+    Counties are selected by FIPS codes and/or two-digit state prefixes (all counties if
+    neither is given). Returns a dict of arrays shaped (counties, months), plus the FIPS
+    codes that are not in the store under 'missing'. Raises ValueError for codes that are
+    not 1-5 digit FIPS or 1-2 digit state codes.
+    """
+    rows = []
+    missing = []
+    if fips is not None:
+        requested = np.array(_codes(fips, FIPS_PATTERN, 5, 'FIPS'), dtype='U5')
+        positions = np.searchsorted(store['fips'], requested)
+        found = positions < len(store['fips'])
+        found[found] = store['fips'][positions[found]] == requested[found]
+        rows.append(positions[found])
+        missing = requested[~found].tolist()
+    if states is not None:
+        for state in _codes(states, STATE_PATTERN, 2, 'State'):
+            start_row, stop_row = store['state_index'].get(state, (0, 0))
+            rows.append(np.arange(start_row, stop_row))
+    if fips is None and states is None:
+        rows.append(np.arange(len(store['fips'])))
+
+    rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.intp)
+    # Drop duplicates (a county asked for by FIPS and by state) but keep request order
+    rows = rows[np.sort(np.unique(rows, return_index=True)[1])]
+
+    first, stop = _month_bounds(store, start, end)
+    codes = np.asarray(store['codes'][rows, first:stop])
+    return {
+        'fips': store['fips'][rows],
+        'months': store['months'][first:stop],
+        'codes': codes,
+        'classes': CLASS_LABELS[codes],
+        'scores': np.asarray(store['scores'][rows, first:stop]),
+        'variables': store['variables'],
+        'values': np.asarray(store['values'][rows, first:stop]),
+        'missing': missing
+    }
+
+def _json_ready(values, decimals):
+    """Rounded nested lists with NaN replaced by None, converted in one pass"""
+    values = values.astype(np.float64)
+    rounded = np.round(values, decimals).astype(object)
+    rounded[np.isnan(values)] = None
+    return rounded.tolist()
+
+def result_to_json(result):
+    """JSON-ready form of a query() result: one entry per county with per-month lists"""
+    variables = result['variables'].tolist()
+    classes = result['classes'].tolist()
+    codes = result['codes'].tolist()
+    scores = _json_ready(result['scores'], 2)
+    # (counties, variables, months) so each variable's series is one list
+    values = _json_ready(result['values'].transpose(0, 2, 1), 4)
+
+    counties = [{
+        'fips': fips,
+        'class': classes[i],
+        'code': codes[i],
+        'score': scores[i],
+        'values': dict(zip(variables, values[i]))
+    } for i, fips in enumerate(result['fips'].tolist())]
+    return {'months': result['months'].tolist(), 'counties': counties, 'missing': result['missing']}
+
+def post_params(body):
+    """query() arguments from a POST /query JSON body; raises ValueError if it is malformed
+
+    fips and states are lists of strings, or a single string; start and end are strings.
+    """
+    if not isinstance(body, dict):
+        raise ValueError('body must be a JSON object like {"fips": ["19153"], "start": "2023-05"}')
+    params = {}
+    for key in ('fips', 'states'):
+        codes = body.get(key)
+        if isinstance(codes, str):
+            codes = [codes]
+        if codes is not None and not (isinstance(codes, list) and all(isinstance(code, str) for code in codes)):
+            raise ValueError(f"{key} must be a list of strings")
+        params[key] = codes
+    for key in ('start', 'end'):
+        if body.get(key) is not None and not isinstance(body[key], str):
+            raise ValueError(f"{key} must be a YYYY-MM string")
+        params[key] = body.get(key)
+    return params
+
+def make_handler(store):
+    class QueryHandler(BaseHTTPRequestHandler):
+        """GET /query?fips=19153,19155&state=19&start=2023-05&end=2023-08, or POST /query with
+        a JSON body {"fips": [...], "states": [...], "start": ..., "end": ...} for large batches"""
+
+        def _respond(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _run(self, params):
+            try:
+                result = query(store, params.get('fips'), params.get('states'),
+                               params.get('start'), params.get('end'))
+            except ValueError as error:
+                self._respond(400, {'error': str(error)})
+                return
+            self._respond(200, result_to_json(result))
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != '/query':
+                self._respond(404, {'error': 'use /query'})
+                return
+            args = parse_qs(url.query)
+            params = {
+                'fips': ','.join(args['fips']).split(',') if 'fips' in args else None,
+                'states': ','.join(args['state']).split(',') if 'state' in args else None,
+                'start': args.get('start', [None])[0],
+                'end': args.get('end', [None])[0]
+            }
+            self._run(params)
+
+        def do_POST(self):
+            if urlparse(self.path).path != '/query':
+                self._respond(404, {'error': 'use /query'})
+                return
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                body = json.loads(self.rfile.read(length) or b'{}')
+            except ValueError:
+                self._respond(400, {'error': 'body must be JSON'})
+                return
+            try:
+                params = post_params(body)
+            except ValueError as error:
+                self._respond(400, {'error': str(error)})
+                return
+            self._run(params)
+
+        def log_message(self, format, *args):
+            pass
+
+    return QueryHandler
+
+def serve(store, host='127.0.0.1', port=8765):
+    server = ThreadingHTTPServer((host, port), make_handler(store))
+    print(f"Serving suitability queries on http://{host}:{port}/query")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,81 @@
+"""Dense counties x months store of monthly suitability results"""
+
+import numpy as np
+import os
+
+# Indexed by class code; 0 marks a county with no row in that month
+CLASS_LABELS = np.array([
+    '',
+    'Highly Suitable (S1)',
+    'Moderately Suitable (S2)',
+    'Marginally Suitable (S3)',
+    'Not Suitable (N)',
+    'No Data'
+], dtype=object)
+
+# Criterion inputs kept alongside the classes, as a (counties, months, variables) cube
+VALUE_COLUMNS = ['ppt', 'tmin', 'tmean', 'tmax', 'ph', 'om', 'clay', 'sand', 'aws', 'db']
+
+STORE_ARRAYS = ['fips', 'months', 'codes', 'scores', 'variables', 'values']
+
+def month_labels(years, months):
+    """'YYYY-MM' labels for parallel year/month arrays"""
+    return np.array([f'{int(y)}-{int(m):02d}' for y, m in zip(years, months)], dtype='U7')
+
+def empty_store(fips_index, month_index, variables=VALUE_COLUMNS):
+    """Store dict with all cells unset (code 0, NaN score and values)"""
+    n_fips, n_months = len(fips_index), len(month_index)
+    return {
+        'fips': np.asarray(fips_index, dtype='U5'),
+        'months': np.asarray(month_index, dtype='U7'),
+        'codes': np.zeros((n_fips, n_months), dtype=np.uint8),
+        'scores': np.full((n_fips, n_months), np.nan, dtype=np.float32),
+        'variables': np.asarray(variables, dtype='U16'),
+        'values': np.full((n_fips, n_months, len(variables)), np.nan, dtype=np.float32)
+    }
+
+def build_result_matrices(data):
+    """Classified long-format rows -> store dict of axes and (counties, months) matrices"""
+    fips_index, fips_pos = np.unique(data['FIPS'].to_numpy(dtype='U5'), return_inverse=True)
+    month_ids = data['Year'].to_numpy(dtype=np.int64) * 12 + data['Month'].to_numpy(dtype=np.int64) - 1
+    month_ids, month_pos = np.unique(month_ids, return_inverse=True)
+    variables = [name for name in VALUE_COLUMNS if name in data.columns]
+
+    store = empty_store(fips_index, month_labels(month_ids // 12, month_ids % 12 + 1), variables)
+    store['codes'][fips_pos, month_pos] = data['Suitability_Code'].to_numpy()
+    store['scores'][fips_pos, month_pos] = data['Suitability_Score'].to_numpy()
+    if variables:
+        store['values'][fips_pos, month_pos] = data[variables].to_numpy(dtype=np.float32)
+    return store
+
+def write_result_store(path, store):
+    """Save each array of the store as an .npy file under path"""
+    os.makedirs(path, exist_ok=True)
+    for name in STORE_ARRAYS:
+        np.save(os.path.join(path, f'{name}.npy'), store[name])
+
+def store_files(path):
+    return [os.path.join(path, f'{name}.npy') for name in STORE_ARRAYS]
+
+def open_result_store(path, mmap=True):
+    """Store dict from path; the matrices are memory-mapped by default"""
+    mmap_mode = 'r' if mmap else None
+    return {name: np.load(os.path.join(path, f'{name}.npy'),
+                          mmap_mode=mmap_mode if name in ('codes', 'scores', 'values') else None)
+            for name in STORE_ARRAYS}
+
+def _position(axis, label, kind):
+    i = np.searchsorted(axis, label)
+    if i == len(axis) or axis[i] != label:
+        raise KeyError(f"{kind} {label!r} is not in the result store")
+    return i
+
+def county_series(store, fips):
+    """(months, codes, scores) for one county, e.g. county_series(store, '19153')"""
+    i = _position(store['fips'], str(fips).zfill(5), 'FIPS')
+    return store['months'], np.asarray(store['codes'][i]), np.asarray(store['scores'][i])
+
+def month_map(store, month):
+    """(fips, codes, scores) for one month, e.g. month_map(store, '2023-07')"""
+    j = _position(store['months'], month, 'Month')
+    return store['fips'], np.asarray(store['codes'][:, j]), np.asarray(store['scores'][:, j])
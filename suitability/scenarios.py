@@ -0,0 +1,112 @@
+"""Scenario sweeps: score alternative criteria tables and class cutoffs in one pass"""
+
+import pandas as pd
+import numpy as np
+from datetime import datetime
+import json
+import os
+
+from .classify import CRITERIA_COLUMNS, DEFAULT_CRITERIA, DEFAULT_CLASS_CUTOFFS, classify_scenarios
+from .trace import stage
+
+def load_scenarios(path):
+    """Scenario definitions from JSON: [{"name": ..., "criteria": [row, ...], "cutoffs": [S1, S2, S3]}, ...]
+    
+    Rows listed for a criterion replace all default rows of that criterion; a scenario
+    without "criteria" or "cutoffs" keeps the defaults. Row keys follow CRITERIA_COLUMNS;
+    a missing or null low/high means unbounded and closed flags default to true.
+    """
+    
+    with open(path, encoding='utf-8') as f:
+        specs = json.load(f)
+    
+    names, tables, cutoffs = [], [], []
+    for i, spec in enumerate(specs):
+        table = DEFAULT_CRITERIA
+        if spec.get('criteria'):
+            rows = pd.DataFrame(spec['criteria']).reindex(columns=CRITERIA_COLUMNS)
+            if rows['criterion'].isna().any() or rows['points'].isna().any():
+                raise ValueError(f"Scenario {i}: every criteria row needs 'criterion' and 'points'")
+            default_max = DEFAULT_CRITERIA.groupby('criterion')['max_points'].first()
+            rows['column'] = rows['column'].fillna(rows['criterion'])
+            rows['scale'] = rows['scale'].fillna(1)
+            rows['max_points'] = rows['max_points'].fillna(rows['criterion'].map(default_max))
+            rows['max_points'] = rows['max_points'].fillna(rows.groupby('criterion')['points'].transform('max'))
+            rows['low'] = rows['low'].fillna(-np.inf)
+            rows['high'] = rows['high'].fillna(np.inf)
+            rows['low_closed'] = rows['low_closed'].fillna(True).astype(bool)
+            rows['high_closed'] = rows['high_closed'].fillna(True).astype(bool)
+            
+            # Replaced criteria keep their position so scores add up in the usual order
+            parts = []
+            for name in dict.fromkeys(list(table['criterion']) + list(rows['criterion'])):
+                source = rows if name in set(rows['criterion']) else table
+                parts.append(source[source['criterion'] == name])
+            table = pd.concat(parts, ignore_index=True)
+        
+        scenario_cutoffs = tuple(spec.get('cutoffs', DEFAULT_CLASS_CUTOFFS))
+        if len(scenario_cutoffs) != 3:
+            raise ValueError(f"Scenario {i}: 'cutoffs' must list the S1, S2 and S3 minimum percentages")
+        
+        names.append(spec.get('name', f'scenario_{i}'))
+        tables.append(table)
+        cutoffs.append(scenario_cutoffs)
+    
+    return names, tables, cutoffs
+
+def run_scenario_sweep(data, scenarios_path, output_dir):
+    """Classify every row under each scenario and write the cube plus per-scenario monthly stats"""
+    
+    names, tables, cutoffs = load_scenarios(scenarios_path)
+    print(f"Scoring {len(names)} scenarios over {len(data)} rows...")
+    with stage('classify_scenarios', rows=len(data), scenarios=len(names)):
+        codes, scores = classify_scenarios(data, tables, cutoffs)
+    
+    fips_index, fips_pos = np.unique(data['FIPS'].to_numpy(dtype=str), return_inverse=True)
+    month_ids = data['Year'].to_numpy(dtype=np.int64) * 12 + data['Month'].to_numpy(dtype=np.int64) - 1
+    month_index, month_pos = np.unique(month_ids, return_inverse=True)
+    n_scenarios, n_fips, n_months = len(names), len(fips_index), len(month_index)
+    
+    # scenarios x counties x months; code 0 / NaN score where a county has no row that month
+    code_cube = np.zeros((n_scenarios, n_fips, n_months), dtype=np.uint8)
+    score_cube = np.full((n_scenarios, n_fips, n_months), np.nan, dtype=np.float32)
+    code_cube[:, fips_pos, month_pos] = codes
+    score_cube[:, fips_pos, month_pos] = scores
+    
+    # Per-scenario monthly class counts and score sums from one bincount each
+    scenario_month = np.arange(n_scenarios)[:, None] * n_months + month_pos
+    counts = np.bincount((scenario_month * 5 + codes - 1).ravel(),
+                         minlength=n_scenarios * n_months * 5).reshape(n_scenarios * n_months, 5)
+    score_sums = np.bincount(scenario_month.ravel(), weights=scores.ravel(),
+                             minlength=n_scenarios * n_months)
+    totals = counts.sum(axis=1)
+    
+    years_axis, months_axis = month_index // 12, month_index % 12 + 1
+    stats = pd.DataFrame({
+        'Scenario': np.repeat(names, n_months),
+        'Year': np.tile(years_axis, n_scenarios),
+        'Month': np.tile(months_axis, n_scenarios),
+        'Month_Name': np.tile([datetime(int(y), int(m), 1).strftime('%B')
+                               for y, m in zip(years_axis, months_axis)], n_scenarios),
+        'Total_Counties': totals,
+        'S1_Count': counts[:, 0],
+        'S2_Count': counts[:, 1],
+        'S3_Count': counts[:, 2],
+        'N_Count': counts[:, 3],
+        'NoData_Count': counts[:, 4],
+        'Avg_Score': score_sums / np.maximum(totals, 1)
+    })
+    stats = stats[stats['Total_Counties'] > 0].reset_index(drop=True)
+    for label in ['S1', 'S2', 'S3', 'N', 'NoData']:
+        stats[f'{label}_Pct'] = stats[f'{label}_Count'] / stats['Total_Counties'] * 100
+    
+    os.makedirs(output_dir, exist_ok=True)
+    with stage('write_scenarios', scenarios=n_scenarios):
+        np.savez(os.path.join(output_dir, 'scenario_results.npz'),
+                 scenarios=np.array(names), fips=fips_index,
+                 months=np.array([f'{y}-{m:02d}' for y, m in zip(years_axis, months_axis)]),
+                 codes=code_cube, scores=score_cube)
+        stats.to_csv(os.path.join(output_dir, 'scenario_statistics.csv'), index=False)
+    
+    print(f"Done; {n_scenarios} scenarios x {n_fips} counties x {n_months} months")
+    print(f"Outputs saved to: {output_dir}/")
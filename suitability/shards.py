@@ -0,0 +1,240 @@
+"""Sharded runs keyed on the FIPS state prefix, and merging shards into one national run
+
+Each shard classifies only the rows of its states and writes the partial results:
+per-month class counts and score sums (partials.csv, the month_partials format), its
+classified rows per month with their positions in the input, and a shard.json describing
+what it covered. Counts and sums of disjoint row sets add up, so merge_shards combines any
+set of shards into the same monthly_statistics.csv, charts and SUMMARY_REPORT.txt a single
+run over those states writes. The shards' CSV lines are copied unparsed, in input order,
+so the merged per-month CSVs and result store are the single run's too; verify_merge
+checks this.
+"""
+
+import numpy as np
+import pandas as pd
+from datetime import datetime
+import filecmp
+import json
+import os
+import shutil
+import tempfile
+
+from .classify import (classify_suitability_batch, partition_by_month, month_partials,
+                       add_month_partials, finalize_month_stats, summarize_months)
+from .input_cache import load_merged, file_sha256
+from .paths import (INPUT_CSV, OUTPUT_DIR, DATA_DIR, SHARDS_DIR, RESULT_STORE_PATH, SUMMARY_FILES,
+                    month_csv_path)
+from .pipeline import code_hash, load_classified, make_output_dirs, write_summary, result_store_from_csvs
+from .result_store import build_result_matrices, write_result_store, store_files
+from .trace import stage
+
+SHARD_VERSION = 2
+
+def parse_states(text):
+    """'19,17,5' -> ['05', '17', '19']"""
+    states = sorted({part.strip().zfill(2) for part in text.split(',') if part.strip()})
+    if not states or not all(state.isdigit() and len(state) == 2 for state in states):
+        raise ValueError(f"Expected comma-separated two-digit state FIPS codes, got {text!r}")
+    return states
+
+def states_for_shard(all_states, index, count):
+    """The states of shard index (0-based) out of count, dealt round-robin over the sorted codes
+
+    Every machine derives the same split from the same input, with no coordination.
+    """
+    return [state for i, state in enumerate(sorted(all_states)) if i % count == index]
+
+def shard_name(states):
+    return f"states_{'-'.join(states)}" if len(states) <= 4 else f"states_{states[0]}-{states[-1]}_{len(states)}"
+
+def shard_month_path(shard_dir, year, month):
+    return os.path.join(shard_dir, 'data', os.path.basename(month_csv_path(year, month)))
+
+def shard_rows_path(shard_dir, year, month):
+    """Input row position of each line of a shard's month CSV"""
+    return os.path.join(shard_dir, 'data', f"{year}_{month:02d}_rows.npy")
+
+def run_shard(states=None, shard=None, output_dir=None, csv_path=INPUT_CSV):
+    """Classify the rows of some states and write their partial results; returns the shard directory
+
+    Pass states (list of two-digit codes) or shard=(index, count) to take every count-th
+    state present in the input.
+    """
+
+    print("Loading monthly data...")
+    with stage('load', source=csv_path) as span:
+        df = load_merged(csv_path, padded_fips=True)
+        span.set(rows=len(df))
+
+    prefixes = df['FIPS'].str[:2]
+    if shard is not None:
+        states = states_for_shard(prefixes.unique(), *shard)
+    keep = prefixes.isin(states).to_numpy()
+    df = df[keep].reset_index(drop=True)
+    if len(df) == 0:
+        raise ValueError(f"No input rows for states {', '.join(states)}")
+
+    output_dir = output_dir or os.path.join(SHARDS_DIR, shard_name(states))
+    os.makedirs(os.path.join(output_dir, 'data'), exist_ok=True)
+    print(f"Shard {output_dir}: {len(states)} states, {len(df)} rows")
+
+    with stage('classify', rows=len(df)):
+        df[['Suitability_Class', 'Suitability_Code', 'Suitability_Score']] = classify_suitability_batch(df)
+    with stage('partition', rows=len(df)):
+        df, month_slices = partition_by_month(df.assign(Source_Row=np.flatnonzero(keep)))
+        source_rows = df.pop('Source_Row').to_numpy()
+
+    for (year, month), rows in month_slices.items():
+        with stage('write_csv', month=f"{year}-{month:02d}", rows=int(rows.stop - rows.start)):
+            df.iloc[rows].to_csv(shard_month_path(output_dir, year, month), index=False)
+            np.save(shard_rows_path(output_dir, year, month), source_rows[rows])
+
+    with stage('partials', rows=len(df)):
+        month_partials(df).to_csv(os.path.join(output_dir, 'partials.csv'))
+
+    manifest = {
+        'version': SHARD_VERSION,
+        'states': list(states),
+        'rows': len(df),
+        'months': [f"{year}-{month:02d}" for year, month in month_slices],
+        'input_sha256': file_sha256(csv_path),
+        'code_sha256': code_hash(),
+        'created': datetime.now().isoformat(timespec='seconds')
+    }
+    with open(os.path.join(output_dir, 'shard.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1)
+    return output_dir
+
+def load_shard(shard_dir):
+    with open(os.path.join(shard_dir, 'shard.json'), encoding='utf-8') as f:
+        manifest = json.load(f)
+    partials = pd.read_csv(os.path.join(shard_dir, 'partials.csv'), index_col=['Year', 'Month'],
+                           float_precision='round_trip')
+    return manifest, partials
+
+def check_shards(manifests, shard_dirs):
+    """Raise ValueError if shards overlap or were computed from different inputs or code"""
+
+    owner = {}
+    for manifest, shard_dir in zip(manifests, shard_dirs):
+        if manifest.get('version') != SHARD_VERSION:
+            raise ValueError(f"{shard_dir}: unsupported shard version {manifest.get('version')}")
+        for state in manifest['states']:
+            if state in owner:
+                raise ValueError(f"State {state} is in both {owner[state]} and {shard_dir}")
+            owner[state] = shard_dir
+
+    for key, what in (('input_sha256', 'input CSVs'), ('code_sha256', 'code versions')):
+        if len({manifest[key] for manifest in manifests}) > 1:
+            raise ValueError(f"Shards were computed from different {what}: "
+                             + ', '.join(f"{d} ({m[key][:12]})" for m, d in zip(manifests, shard_dirs)))
+
+def merge_month_csv(shard_dirs, year, month):
+    """Write one month's CSV from the shards' lines, in input order, without parsing them
+
+    Every field is on one line, so each line after the header is one row.
+    """
+
+    header, lines, positions = None, [], []
+    for shard_dir in shard_dirs:
+        path = shard_month_path(shard_dir, year, month)
+        if not os.path.exists(path):
+            continue
+        with open(path, 'rb') as f:
+            shard_header, *shard_lines = f.read().splitlines(keepends=True)
+        if header is None:
+            header = shard_header
+        elif shard_header != header:
+            raise ValueError(f"{path}: columns differ from the other shards")
+        shard_rows = np.load(shard_rows_path(shard_dir, year, month))
+        if len(shard_rows) != len(shard_lines):
+            raise ValueError(f"{path}: {len(shard_lines)} rows but {len(shard_rows)} row positions")
+        lines += shard_lines
+        positions.append(shard_rows)
+
+    order = np.argsort(np.concatenate(positions), kind='stable')
+    with open(month_csv_path(year, month), 'wb') as f:
+        f.write(header)
+        f.writelines(lines[i] for i in order)
+    return len(lines)
+
+def merge_shards(shard_dirs, maps='monthly'):
+    """Combine shards into the per-month CSVs, result store, monthly statistics, charts and report
+
+    Monthly statistics come from the summed partials alone; the classified rows of each
+    month are copied in input order so maps can be rendered afterwards.
+    """
+
+    loaded = [load_shard(shard_dir) for shard_dir in shard_dirs]
+    manifests = [manifest for manifest, _ in loaded]
+    check_shards(manifests, shard_dirs)
+
+    with stage('merge_partials', shards=len(loaded)):
+        partials = None
+        for _, shard_partials in loaded:
+            partials = add_month_partials(partials, shard_partials)
+        stats_df = finalize_month_stats(partials)
+    month_keys = list(zip(stats_df['Year'], stats_df['Month']))
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    for year, month in month_keys:
+        with stage('merge_csv', month=f"{year}-{month:02d}") as span:
+            span.set(rows=merge_month_csv(shard_dirs, year, month))
+
+    with stage('result_store', months=len(month_keys)):
+        write_result_store(RESULT_STORE_PATH, result_store_from_csvs(month_keys))
+
+    states = sorted(state for manifest in manifests for state in manifest['states'])
+    print(f"Merged {len(shard_dirs)} shards: {len(states)} states, "
+          f"{sum(manifest['rows'] for manifest in manifests)} rows, {len(month_keys)} months")
+    return write_summary(stats_df, maps)
+
+def _output_files():
+    """Outputs a single run and a merge both write: per-month CSVs, result store, summary files"""
+    data = sorted(os.path.join(DATA_DIR, name) for name in os.listdir(DATA_DIR))
+    return data + store_files(RESULT_STORE_PATH) + SUMMARY_FILES
+
+def verify_merge(shard_counts=(1, 3), csv_path=INPUT_CSV):
+    """Check that merging shards reproduces a single run byte for byte
+
+    In a scratch directory, classifies csv_path once as run does (without maps), then
+    splits it into each number of shards and merges them. Returns {shard count: files
+    that differ from the single run or are missing}.
+    """
+
+    csv_path = os.path.abspath(csv_path)
+    workdir = tempfile.mkdtemp(prefix='suitability-shards-')
+    cwd = os.getcwd()
+    try:
+        os.chdir(workdir)
+        os.makedirs(os.path.dirname(INPUT_CSV), exist_ok=True)
+        shutil.copyfile(csv_path, INPUT_CSV)
+
+        print("Single run...")
+        make_output_dirs(None)
+        df, month_slices, _ = load_classified()
+        for (year, month), rows in month_slices.items():
+            df.iloc[rows].to_csv(month_csv_path(year, month), index=False)
+        write_result_store(RESULT_STORE_PATH, build_result_matrices(df))
+        write_summary(summarize_months(df), 'monthly')
+        del df
+        expected = _output_files()
+        os.rename(OUTPUT_DIR, 'single')
+
+        mismatches = {}
+        for count in shard_counts:
+            print(f"Merging {count} shards...")
+            shard_dirs = [run_shard(shard=(index, count), output_dir=f'shards_{count}/{index}')
+                          for index in range(count)]
+            make_output_dirs(None)
+            merge_shards(shard_dirs, 'monthly')
+            paths = sorted(set(expected) | set(_output_files()))
+            mismatches[count] = [path for path in paths
+                                 if not (os.path.exists(path) and path in expected
+                                         and filecmp.cmp(os.path.join('single', os.path.relpath(path, OUTPUT_DIR)),
+                                                         path, shallow=False))]
+            shutil.rmtree(OUTPUT_DIR)
+        return mismatches
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
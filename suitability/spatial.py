@@ -0,0 +1,211 @@
+"""County adjacency, neighbour-smoothed scores and Moran's I for every month
+
+The adjacency matrix is built once from the county GeoJSON the maps use. Counties that
+share a boundary vertex are queen neighbours. Counties that share at least two vertices
+(an edge) are rook neighbours. The matrix is cached as a scipy.sparse file keyed on the
+geometry content. The statistics for all months come from sparse matrix x dense
+(counties, months) products. Missing county-months are left out: each month's weights
+are row-standardized over the neighbours that have a score that month.
+"""
+
+import pandas as pd
+import numpy as np
+from scipy import sparse
+from datetime import datetime
+import hashlib
+import math
+import os
+
+from .paths import CACHE_DIR
+from .geometry import GEOMETRY_PATH, fetch_county_geometry, load_county_geometry
+
+ADJACENCY_CACHE_DIR = f'{CACHE_DIR}/county_adjacency'
+ADJACENCY_VERSION = 1
+
+# Vertices closer than this (degrees) are the same point
+VERTEX_DECIMALS = 6
+
+# Local Moran quadrant codes; 0 = no score or no neighbour with a score
+QUADRANTS = ['', 'High-High', 'Low-Low', 'Low-High', 'High-Low']
+
+def county_vertices(geojson):
+    """(FIPS codes, county index per vertex, vertex id per vertex) of all exterior and hole rings"""
+    fips, owners, points = [], [], []
+    for feature in geojson['features']:
+        geometry = feature['geometry']
+        polygons = [geometry['coordinates']] if geometry['type'] == 'Polygon' else geometry['coordinates']
+        rings = [np.asarray(ring, dtype=np.float64)[:, :2] for polygon in polygons for ring in polygon]
+        if not rings:
+            continue
+        county_points = np.concatenate(rings)
+        owners.append(np.full(len(county_points), len(fips)))
+        points.append(county_points)
+        fips.append(str(feature['id']).zfill(5))
+
+    coordinates = np.round(np.concatenate(points) * 10 ** VERTEX_DECIMALS).astype(np.int64)
+    vertex_id = np.unique(coordinates, axis=0, return_inverse=True)[1].ravel()
+    return np.array(fips, dtype='U5'), np.concatenate(owners), vertex_id
+
+def build_adjacency(geojson, contiguity='queen'):
+    """Symmetric binary adjacency (csr, counties sorted by FIPS) and its FIPS axis"""
+    if contiguity not in ('queen', 'rook'):
+        raise ValueError(f"contiguity must be 'queen' or 'rook', not {contiguity!r}")
+
+    fips, owner, vertex = county_vertices(geojson)
+    # One entry per (vertex, county), sorted so counties sharing a vertex are adjacent runs
+    pairs = np.unique(np.column_stack([vertex, owner]), axis=0)
+    vertex, owner = pairs[:, 0], pairs[:, 1]
+
+    rows, cols = [], []
+    for offset in range(1, len(vertex)):
+        same = vertex[offset:] == vertex[:-offset]
+        if not same.any():
+            break
+        rows.append(owner[:-offset][same])
+        cols.append(owner[offset:][same])
+    rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+    cols = np.concatenate(cols) if cols else np.zeros(0, dtype=np.int64)
+
+    # Shared-vertex counts per county pair, both directions
+    n = len(fips)
+    shared = sparse.coo_matrix((np.ones(2 * len(rows)), (np.r_[rows, cols], np.r_[cols, rows])),
+                               shape=(n, n)).tocsr()
+    shared.sum_duplicates()
+    shared.setdiag(0)
+    shared.eliminate_zeros()
+    if contiguity == 'rook':
+        shared.data[shared.data < 2] = 0
+        shared.eliminate_zeros()
+    adjacency = (shared > 0).astype(np.float64).tocsr()
+
+    # Duplicate FIPS (multi-feature counties) are merged; rows are ordered by FIPS
+    order_fips, county = np.unique(fips, return_inverse=True)
+    merge = sparse.csr_matrix((np.ones(n), (county, np.arange(n))), shape=(len(order_fips), n))
+    adjacency = (merge @ adjacency @ merge.T).tocsr()
+    adjacency.setdiag(0)
+    adjacency.eliminate_zeros()
+    adjacency.data[:] = 1.0
+    return adjacency, order_fips
+
+def load_adjacency(geometry_path=GEOMETRY_PATH, contiguity='queen', cache_dir=ADJACENCY_CACHE_DIR):
+    """build_adjacency result, cached per geometry file content and contiguity rule"""
+    with open(fetch_county_geometry(geometry_path), 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:16]
+    cache_path = os.path.join(cache_dir, f'v{ADJACENCY_VERSION}_{digest}_{contiguity}')
+
+    if not os.path.exists(cache_path + '.npz'):
+        adjacency, fips = build_adjacency(load_county_geometry(geometry_path), contiguity)
+        os.makedirs(cache_dir, exist_ok=True)
+        sparse.save_npz(cache_path + '.tmp.npz', adjacency)
+        np.save(cache_path + '_fips.npy', fips)
+        os.replace(cache_path + '.tmp.npz', cache_path + '.npz')
+        return adjacency, fips
+    return sparse.load_npz(cache_path + '.npz').tocsr(), np.load(cache_path + '_fips.npy')
+
+def align_adjacency(adjacency, adjacency_fips, fips):
+    """Adjacency restricted and reordered to the counties in fips (others get no neighbours)"""
+    position = np.searchsorted(adjacency_fips, fips)
+    position = np.minimum(position, len(adjacency_fips) - 1)
+    found = adjacency_fips[position] == fips
+    select = sparse.csr_matrix((np.ones(found.sum()), (np.flatnonzero(found), position[found])),
+                               shape=(len(fips), len(adjacency_fips)))
+    return (select @ adjacency @ select.T).tocsr()
+
+def spatial_statistics(adjacency, scores):
+    """Neighbour smoothing and global/local Moran's I of (counties, months) scores
+
+    NaN scores are missing. For every month at once:
+    - lag: mean score of the neighbours that have a score
+    - smoothed: mean over the county and those neighbours
+    - local_i: local Moran's I, (z_i / m2) * lag of z
+    - quadrant: index into QUADRANTS
+    The global statistic per month uses the row-standardized weights: Moran's I, its
+    expectation, and a z-score and two-sided p-value under the normality assumption.
+    """
+
+    observed = ~np.isnan(scores)
+    x = np.where(observed, scores, 0.0)
+    n = observed.sum(axis=0)
+
+    # Neighbours with a score that month, per county: one sparse x dense product
+    neighbours = adjacency @ observed.astype(np.float64)
+    has_neighbours = observed & (neighbours > 0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = x.sum(axis=0) / n
+        z = np.where(observed, x - mean, 0.0)
+        lag = np.where(has_neighbours, (adjacency @ x) / neighbours, np.nan)
+        lag_z = np.where(has_neighbours, (adjacency @ z) / neighbours, 0.0)
+        smoothed = np.where(observed, (x + adjacency @ x) / (1 + neighbours), np.nan)
+
+        m2 = (z ** 2).sum(axis=0) / n
+        s0 = has_neighbours.sum(axis=0)
+        morans_i = (n / s0) * (z * lag_z).sum(axis=0) / (m2 * n)
+        local_i = np.where(has_neighbours, z / m2 * lag_z, np.nan)
+
+    quadrant = np.select([z > 0, z < 0], [np.where(lag_z > 0, 1, 4), np.where(lag_z < 0, 2, 3)], 0)
+    quadrant = np.where(has_neighbours, quadrant, 0).astype(np.uint8)
+
+    expected, variance = moran_moments(adjacency, observed, neighbours, has_neighbours, n, s0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z_score = (morans_i - expected) / np.sqrt(variance)
+    p_value = np.array([math.erfc(abs(value) / math.sqrt(2)) if np.isfinite(value) else np.nan
+                        for value in z_score])
+
+    return {'lag': lag, 'smoothed': smoothed, 'local_i': local_i, 'quadrant': quadrant,
+            'morans_i': morans_i, 'expected_i': expected, 'z_score': z_score, 'p_value': p_value, 'n': n}
+
+def moran_moments(adjacency, observed, neighbours, has_neighbours, n, s0):
+    """E[I] and Var[I] under normality for each month's row-standardized weights
+
+    S1 and S2 are sums over the adjacency's edges, evaluated for all months at once on
+    the (edges, months) weight matrix.
+    """
+    coo = adjacency.tocoo()
+    i, j = coo.row, coo.col
+    with np.errstate(invalid='ignore', divide='ignore'):
+        inverse = np.where(has_neighbours, 1 / neighbours, 0.0)
+    active = has_neighbours[i] & has_neighbours[j]
+    # w_ij + w_ji on every directed edge; each undirected pair appears twice
+    pair = np.where(active, inverse[i] + inverse[j], 0.0)
+    s1 = (pair ** 2).sum(axis=0) / 2
+
+    # Column sums of the row-standardized weights: sparse x dense again
+    column_sums = adjacency.T @ inverse
+    s2 = (np.where(has_neighbours, 1.0, 0.0) + np.where(observed, column_sums, 0.0)) ** 2
+    s2 = s2.sum(axis=0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        expected = -1 / (n - 1)
+        variance = (n ** 2 * s1 - n * s2 + 3 * s0 ** 2) / ((n ** 2 - 1) * s0 ** 2) - expected ** 2
+    return expected, variance
+
+def write_spatial(store, adjacency, adjacency_fips, output_dir):
+    """spatial.npz (smoothed, lag, local I, quadrants) and morans_i.csv for every month"""
+    fips = np.asarray(store['fips'])
+    weights = align_adjacency(adjacency, adjacency_fips, fips)
+    scores = np.asarray(store['scores'], dtype=np.float64)
+    stats = spatial_statistics(weights, scores)
+
+    months = np.asarray(store['months'])
+    years, month_numbers = [int(label[:4]) for label in months], [int(label[5:]) for label in months]
+    table = pd.DataFrame({
+        'Year': years,
+        'Month': month_numbers,
+        'Month_Name': [datetime(y, m, 1).strftime('%B') for y, m in zip(years, month_numbers)],
+        'Counties': stats['n'],
+        'Morans_I': stats['morans_i'],
+        'Expected_I': stats['expected_i'],
+        'Z_Score': stats['z_score'],
+        'P_Value': stats['p_value'],
+        **{f"{name.replace('-', '_')}_Counties": (stats['quadrant'] == code).sum(axis=0)
+           for code, name in enumerate(QUADRANTS) if code}
+    })
+
+    os.makedirs(output_dir, exist_ok=True)
+    np.savez(os.path.join(output_dir, 'spatial.npz'), fips=fips, months=months,
+             smoothed=stats['smoothed'].astype(np.float32), lag=stats['lag'].astype(np.float32),
+             local_i=stats['local_i'].astype(np.float32), quadrant=stats['quadrant'],
+             quadrant_labels=np.array(QUADRANTS))
+    table.to_csv(os.path.join(output_dir, 'morans_i.csv'), index=False)
+    return table, int(weights.nnz // 2), int((np.diff(weights.indptr) == 0).sum())
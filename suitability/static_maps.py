@@ -0,0 +1,192 @@
+"""Static PNG county maps painted from a cached FIPS -> pixel label raster"""
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+from functools import lru_cache
+import hashlib
+import os
+
+from .classify import SUITABILITY_CLASSES, CLASS_COLORS
+from .geometry import GEOMETRY_PATH, fetch_county_geometry, load_county_geometry
+from .paths import CACHE_DIR
+
+RASTER_CACHE_DIR = f'{CACHE_DIR}/county_raster'
+RASTER_VERSION = 1
+
+# Layout around the map, in pixels
+MARGIN = 20
+TITLE_HEIGHT = 70
+LEGEND_WIDTH = 330
+
+# Palette rows: 0 background, 1-5 suitability codes, then counties without data, borders
+# and TEXT_LEVELS shades of grey for text
+BACKGROUND, MISSING, BORDER, TEXT = 0, 6, 7, 8
+TEXT_LEVELS = 8
+
+# 50 states + DC; territories are not drawn
+STATE_FIPS = {
+    '01', '02', '04', '05', '06', '08', '09', '10', '11', '12', '13', '15', '16', '17', '18', '19',
+    '20', '21', '22', '23', '24', '25', '26', '27', '28', '29', '30', '31', '32', '33', '34', '35',
+    '36', '37', '38', '39', '40', '41', '42', '44', '45', '46', '47', '48', '49', '50', '51', '53',
+    '54', '55', '56'
+}
+
+def albers(lon, lat, rotate, center, parallels):
+    """Spherical Albers equal-area conic, with center mapped to the origin (y up)"""
+    phi1, phi2 = np.radians(parallels)
+    n = (np.sin(phi1) + np.sin(phi2)) / 2
+    c = np.cos(phi1) ** 2 + 2 * n * np.sin(phi1)
+
+    def forward(lon, lat):
+        lam = np.radians((np.asarray(lon) + rotate + 180) % 360 - 180)
+        rho = np.sqrt(c - 2 * n * np.sin(np.radians(lat))) / n
+        return rho * np.sin(n * lam), -rho * np.cos(n * lam)
+
+    x, y = forward(lon, lat)
+    x0, y0 = forward(center[0] - rotate, center[1])
+    return x - x0, y - y0
+
+def project_albers_usa(lon, lat, state):
+    """Composite Albers USA projection (as d3/plotly scope='usa') with Alaska and Hawaii insets"""
+    if state == '02':
+        x, y = albers(lon, lat, 154, (-2, 58.5), (55, 65))
+        return 0.35 * x - 0.307, 0.35 * y - 0.201
+    if state == '15':
+        x, y = albers(lon, lat, 157, (-3, 19.9), (8, 18))
+        return x - 0.205, y - 0.212
+    return albers(lon, lat, 96, (-0.6, 38.7), (29.5, 45.5))
+
+def _county_rings(geojson):
+    """(fips, [projected exterior rings]) for every drawable county"""
+    counties = []
+    for feature in geojson['features']:
+        fips = str(feature['id']).zfill(5)
+        if fips[:2] not in STATE_FIPS:
+            continue
+        geometry = feature['geometry']
+        polygons = [geometry['coordinates']] if geometry['type'] == 'Polygon' else geometry['coordinates']
+        rings = []
+        for polygon in polygons:
+            # Holes are ignored; enclosed counties are painted after (on top of) larger ones
+            ring = np.asarray(polygon[0], dtype=np.float64)
+            rings.append(np.column_stack(project_albers_usa(ring[:, 0], ring[:, 1], fips[:2])))
+        counties.append((fips, rings))
+    return counties
+
+def build_county_raster(geojson, width=1600):
+    """Rasterize the counties once into a label image (0 = background, i + 1 = county i)
+
+    Returns a dict with 'labels' (uint16, rows x cols), 'borders' (bool outline mask) and
+    'fips' (sorted FIPS codes that label i + 1 refers to).
+    """
+    counties = sorted(_county_rings(geojson), key=lambda county: county[0])
+    points = np.concatenate([ring for _, rings in counties for ring in rings])
+    low, high = points.min(axis=0), points.max(axis=0)
+    scale = (width - LEGEND_WIDTH - 2 * MARGIN) / (high[0] - low[0])
+    height = int(np.ceil((high[1] - low[1]) * scale)) + TITLE_HEIGHT + MARGIN
+
+    labels = Image.new('I', (width, height), 0)
+    borders = Image.new('L', (width, height), 0)
+    draw_labels, draw_borders = ImageDraw.Draw(labels), ImageDraw.Draw(borders)
+
+    shapes = []
+    for label, (_, rings) in enumerate(counties, start=1):
+        for ring in rings:
+            pixels = np.column_stack([MARGIN + (ring[:, 0] - low[0]) * scale,
+                                      TITLE_HEIGHT + (high[1] - ring[:, 1]) * scale])
+            x, y = pixels[:, 0], pixels[:, 1]
+            area = abs(np.dot(x, np.roll(y, 1)) - np.dot(y, np.roll(x, 1))) / 2
+            shapes.append((area, label, pixels.ravel().tolist()))
+
+    for _, label, xy in sorted(shapes, key=lambda shape: -shape[0]):
+        draw_labels.polygon(xy, fill=label)
+        draw_borders.polygon(xy, outline=1)
+
+    return {
+        'labels': np.asarray(labels, dtype=np.uint16),
+        'borders': np.asarray(borders) > 0,
+        'fips': np.array([fips for fips, _ in counties], dtype='U5')
+    }
+
+def load_county_raster(geometry_path=GEOMETRY_PATH, width=1600, cache_dir=RASTER_CACHE_DIR):
+    """build_county_raster result, cached per geometry file content and width"""
+    with open(fetch_county_geometry(geometry_path), 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:16]
+    cache_path = os.path.join(cache_dir, f'v{RASTER_VERSION}_{digest}_{width}.npz')
+
+    if not os.path.exists(cache_path):
+        raster = build_county_raster(load_county_geometry(geometry_path), width)
+        os.makedirs(cache_dir, exist_ok=True)
+        np.savez(cache_path + '.tmp.npz', **raster)
+        os.replace(cache_path + '.tmp.npz', cache_path)
+        return raster
+    with np.load(cache_path) as cached:
+        return {name: cached[name] for name in ('labels', 'borders', 'fips')}
+
+def make_palette(class_colors, background='#FFFFFF', missing='#EEEEEE', border='#444444'):
+    """(16, 3) uint8 palette: background, the five class colors (in code order), counties
+    without data, borders, then an 8-step grey ramp for anti-aliased text on white"""
+    colors = [background] + list(class_colors) + [missing, border]
+    rows = [[int(c[i:i + 2], 16) for i in (1, 3, 5)] for c in colors]
+    rows += [[255 - (32 * k + 16)] * 3 for k in range(TEXT_LEVELS)]
+    return np.array(rows, dtype=np.uint8)
+
+def paint_counties(raster, fips, codes):
+    """Palette-index image (rows, cols) with each county set to its suitability code"""
+    lookup = np.full(len(raster['fips']) + 1, MISSING, dtype=np.uint8)
+    lookup[0] = BACKGROUND
+    fips = np.asarray(fips, dtype='U5')
+    positions = np.searchsorted(raster['fips'], fips).clip(max=len(raster['fips']) - 1)
+    found = raster['fips'][positions] == fips
+    codes = np.asarray(codes, dtype=np.uint8)
+    # A store code of 0 (no row that month) is shown like a county with no data
+    lookup[positions[found] + 1] = np.where(codes[found] == 0, MISSING, codes[found])
+
+    image = lookup[raster['labels']]
+    image[raster['borders']] = BORDER
+    return image
+
+@lru_cache(maxsize=None)
+def _font(size):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        # Pillow < 10.1 only has the fixed-size bitmap font
+        return ImageFont.load_default()
+
+def save_county_png(raster, fips, codes, palette, filename, title='', class_labels=()):
+    """Paint one month and write it as a palette PNG with a title and class legend"""
+    image = paint_counties(raster, fips, codes)
+
+    # Text is drawn anti-aliased into a coverage mask, then mapped onto the grey ramp
+    text = Image.new('L', (image.shape[1], image.shape[0]), 0)
+    draw = ImageDraw.Draw(text)
+    if title:
+        draw.text((MARGIN, MARGIN), title, fill=255, font=_font(32))
+    left = image.shape[1] - LEGEND_WIDTH + MARGIN
+    font = _font(20)
+    for i, label in enumerate(class_labels):
+        top = TITLE_HEIGHT + MARGIN + i * 34
+        image[top:top + 25, left:left + 25] = BORDER
+        image[top + 1:top + 24, left + 1:left + 24] = i + 1
+        draw.text((left + 34, top + 2), label, fill=255, font=font)
+    coverage = np.asarray(text)
+    inked = coverage > 0
+    image[inked] = TEXT + (coverage[inked] >> 5)
+
+    output = Image.fromarray(image, mode='P')
+    output.putpalette(palette.ravel().tolist())
+    # One byte per pixel and low zlib effort keep encoding to a few milliseconds per map
+    output.save(filename, format='PNG', compress_level=1)
+
+@lru_cache(maxsize=None)
+def default_raster(geometry_path=GEOMETRY_PATH, width=1600):
+    """Raster and class palette shared by every month; load before forking so workers inherit it"""
+    palette = make_palette([CLASS_COLORS[name] for name in SUITABILITY_CLASSES])
+    return load_county_raster(geometry_path, width), palette
+
+def render_month_png(fips, codes, year, month_name, filename, geometry_path=GEOMETRY_PATH, width=1600):
+    """Static PNG map for one month, painted from the cached county raster"""
+    raster, palette = default_raster(geometry_path, width)
+    save_county_png(raster, fips, codes, palette, filename,
+                    f'Land Suitability - {month_name} {year}', SUITABILITY_CLASSES)
@@ -0,0 +1,174 @@
+"""Summary charts, SUMMARY_REPORT.txt and the INDEX.html month listing"""
+
+import pandas as pd
+import matplotlib.pyplot as plt
+from datetime import datetime
+
+from .paths import SUMMARY_DIR, INDEX_PATH, month_map_name
+from .trace import stage
+from .writer import INLINE
+
+def _savefig(fig, filename):
+    with stage('savefig', file=filename):
+        fig.savefig(f'{SUMMARY_DIR}/{filename}', dpi=300, bbox_inches='tight', facecolor='white')
+
+def write_summary_outputs(stats_df, writer=INLINE):
+    """Summary charts, monthly_statistics.csv and SUMMARY_REPORT.txt from the monthly stats
+
+    Each finished chart is closed in pyplot and handed to writer to save as a PNG.
+    """
+    
+    stats_df['Date'] = pd.to_datetime(stats_df[['Year', 'Month']].assign(day=1))
+    
+    stats_df['S1_Pct'] = (stats_df['S1_Count'] / stats_df['Total_Counties'] * 100)
+    stats_df['S2_Pct'] = (stats_df['S2_Count'] / stats_df['Total_Counties'] * 100)
+    stats_df['S3_Pct'] = (stats_df['S3_Count'] / stats_df['Total_Counties'] * 100)
+    stats_df['N_Pct'] = (stats_df['N_Count'] / stats_df['Total_Counties'] * 100)
+    stats_df['NoData_Pct'] = (stats_df['NoData_Count'] / stats_df['Total_Counties'] * 100)
+    
+    # Chart 1: Percentage trends
+    fig, ax = plt.subplots(figsize=(16, 6))
+    ax.plot(stats_df['Date'], stats_df['S1_Pct'], 
+            label='S1 (Highly Suitable)', color='#2E7D32', linewidth=2.5, marker='o', markersize=4)
+    ax.plot(stats_df['Date'], stats_df['S2_Pct'], 
+            label='S2 (Moderately Suitable)', color='#81C784', linewidth=2.5, marker='o', markersize=4)
+    ax.plot(stats_df['Date'], stats_df['S3_Pct'], 
+            label='S3 (Marginally Suitable)', color='#FFF176', linewidth=2.5, marker='o', markersize=4)
+    ax.plot(stats_df['Date'], stats_df['N_Pct'], 
+            label='N (Not Suitable)', color='#E57373', linewidth=2.5, marker='o', markersize=4)
+    ax.set_xlabel('Date', fontweight='bold', fontsize=13)
+    ax.set_ylabel('Percentage of Counties (%)', fontweight='bold', fontsize=13)
+    ax.set_title('Suitability Class Distribution Over Time (2020-2024)', 
+                fontweight='bold', fontsize=16, pad=15)
+    ax.legend(loc='best', fontsize=11, framealpha=0.9)
+    ax.grid(True, alpha=0.3)
+    plt.tight_layout()
+    plt.close(fig)
+    writer.submit(_savefig, fig, 'percentage_trends.png')
+    
+    # Chart 2: Average suitability score
+    fig, ax = plt.subplots(figsize=(16, 6))
+    ax.plot(stats_df['Date'], stats_df['Avg_Score'], 
+            color='steelblue', linewidth=3, marker='o', markersize=5)
+    ax.fill_between(stats_df['Date'], stats_df['Avg_Score'], alpha=0.3, color='steelblue')
+    ax.set_xlabel('Date', fontweight='bold', fontsize=13)
+    ax.set_ylabel('Average Suitability Score (%)', fontweight='bold', fontsize=13)
+    ax.set_title('Average Monthly Suitability Score (2020-2024)', 
+                fontweight='bold', fontsize=16, pad=15)
+    ax.grid(True, alpha=0.3)
+    ax.axhline(y=75, color='#2E7D32', linestyle='--', linewidth=2, alpha=0.6, label='S1 threshold (75%)')
+    ax.axhline(y=60, color='#FFC107', linestyle='--', linewidth=2, alpha=0.6, label='S2 threshold (60%)')
+    ax.axhline(y=40, color='#FF9800', linestyle='--', linewidth=2, alpha=0.6, label='S3 threshold (40%)')
+    ax.legend(loc='best', fontsize=10, framealpha=0.9)
+    plt.tight_layout()
+    plt.close(fig)
+    writer.submit(_savefig, fig, 'average_score_trends.png')
+    
+    # Chart 3: Stacked area
+    fig, ax = plt.subplots(figsize=(16, 6))
+    ax.stackplot(stats_df['Date'], 
+                 stats_df['S1_Count'], stats_df['S2_Count'], 
+                 stats_df['S3_Count'], stats_df['N_Count'],
+                 labels=['S1 (Highly Suitable)', 'S2 (Moderately Suitable)', 
+                        'S3 (Marginally Suitable)', 'N (Not Suitable)'],
+                 colors=['#2E7D32', '#81C784', '#FFF176', '#E57373'],
+                 alpha=0.85)
+    ax.set_xlabel('Date', fontweight='bold', fontsize=13)
+    ax.set_ylabel('Number of Counties', fontweight='bold', fontsize=13)
+    ax.set_title('County Count by Suitability Class (2020-2024)', 
+                fontweight='bold', fontsize=16, pad=15)
+    ax.legend(loc='upper left', fontsize=11, framealpha=0.9)
+    ax.grid(True, alpha=0.3, axis='y')
+    plt.tight_layout()
+    plt.close(fig)
+    writer.submit(_savefig, fig, 'county_count_trends.png')
+    
+    # Seasonal comparison
+    seasonal_data = stats_df.copy()
+    seasonal_data['Season'] = seasonal_data['Month'].map({
+        12: 'Winter', 1: 'Winter', 2: 'Winter',
+        3: 'Spring', 4: 'Spring', 5: 'Spring',
+        6: 'Summer', 7: 'Summer', 8: 'Summer',
+        9: 'Fall', 10: 'Fall', 11: 'Fall'
+    })
+    
+    seasonal_avg = seasonal_data.groupby('Season')[['S1_Pct', 'S2_Pct', 'S3_Pct', 'N_Pct']].mean()
+    season_order = ['Spring', 'Summer', 'Fall', 'Winter']
+    seasonal_avg = seasonal_avg.reindex(season_order)
+    
+    fig, ax = plt.subplots(figsize=(12, 8))
+    seasonal_avg.plot(kind='bar', stacked=True, ax=ax,
+                     color=['#2E7D32', '#81C784', '#FFF176', '#E57373'],
+                     edgecolor='black', linewidth=1)
+    ax.set_title('Average Suitability by Season (2020-2024)', 
+                fontsize=18, fontweight='bold', pad=20)
+    ax.set_xlabel('Season', fontsize=13, fontweight='bold')
+    ax.set_ylabel('Percentage (%)', fontsize=13, fontweight='bold')
+    ax.legend(['S1', 'S2', 'S3', 'N'], title='Class', fontsize=11)
+    ax.set_xticklabels(season_order, rotation=0)
+    ax.grid(axis='y', alpha=0.3)
+    
+    plt.tight_layout()
+    plt.close(fig)
+    writer.submit(_savefig, fig, 'seasonal_comparison.png')
+    
+    stats_df.to_csv(f'{SUMMARY_DIR}/monthly_statistics.csv', index=False)
+    
+    # Create summary report
+    with open(f'{SUMMARY_DIR}/SUMMARY_REPORT.txt', 'w', encoding='utf-8') as f:
+        f.write("MONTHLY LAND SUITABILITY CLASSIFICATION - SUMMARY\n\n")
+        f.write(f"Period: January 2020 - December 2024\n")
+        f.write(f"Total Months Analyzed: {len(stats_df)}\n\n")
+        f.write("AVERAGE SUITABILITY (All Months):\n")
+        f.write(f"S1 (Highly Suitable):      {stats_df['S1_Pct'].mean():.1f}%\n")
+        f.write(f"S2 (Moderately Suitable):  {stats_df['S2_Pct'].mean():.1f}%\n")
+        f.write(f"S3 (Marginally Suitable):  {stats_df['S3_Pct'].mean():.1f}%\n")
+        f.write(f"N (Not Suitable):          {stats_df['N_Pct'].mean():.1f}%\n")
+        f.write(f"No Data (Missing/Invalid): {stats_df['NoData_Pct'].mean():.1f}%\n")
+        f.write(f"\nAverage Suitability Score: {stats_df['Avg_Score'].mean():.1f}%\n")
+    
+    return stats_df
+
+def write_index_html(stats_df, maps):
+    """INDEX.html listing every month with its S1/S2 share"""
+    
+    html_content = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>Monthly Land Suitability Maps (2020-2024)</title>
+</head>
+<body>
+    <h1>Monthly Land Suitability Classification Maps</h1>
+    <p>January 2020 - December 2024 | 60 Interactive Maps</p>
+"""
+    
+    for year in sorted(stats_df['Year'].unique()):
+        html_content += f"""
+    <h2>{year}</h2>
+    <ul>
+"""
+        for month in range(1, 13):
+            month_name = datetime(year, month, 1).strftime('%B')
+            if maps == 'slider':
+                filename = f"VIEWER.html?month={year}-{month:02d}"
+            else:
+                filename = month_map_name(year, month, maps)
+            
+            month_stats = stats_df[(stats_df['Year'] == year) & (stats_df['Month'] == month)]
+            if not month_stats.empty:
+                s1_pct = month_stats.iloc[0]['S1_Pct']
+                s2_pct = month_stats.iloc[0]['S2_Pct']
+                html_content += f"""        <li><a href="{filename}">{month_name}</a> - S1: {s1_pct:.1f}% | S2: {s2_pct:.1f}%</li>
+"""
+        
+        html_content += """    </ul>
+"""
+    
+    html_content += """
+</body>
+</html>
+"""
+    
+    with open(INDEX_PATH, 'w', encoding='utf-8') as f:
+        f.write(html_content)
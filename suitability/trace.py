@@ -0,0 +1,133 @@
+"""Optional per-stage timing and memory trace, written as Chrome trace-event JSON
+
+Instrumented code wraps each stage in `with stage(name, rows=...)`. Until enable() is
+called, stage() returns one shared no-op span, so a disabled trace costs a function call
+per stage. When enabled, every span records wall time, CPU time, the process's peak RSS
+at the end of the span and any arguments such as rows processed. Spans recorded in
+background writer threads go on their own track, with that thread's CPU time. write() saves them in
+the trace-event format that chrome://tracing and Perfetto open directly; the same file
+has a per-stage summary under "otherData".
+"""
+
+import json
+import os
+import resource
+import sys
+import threading
+import time
+
+# None while disabled; otherwise {'origin': perf_counter at enable(), 'events': [...]}
+_trace = None
+
+def peak_rss_mb():
+    """High-water resident set size of this process (ru_maxrss is KiB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class Span:
+    __slots__ = ('name', 'args', 'start', 'cpu_start', 'tid', 'cpu_clock')
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def set(self, **args):
+        """Add arguments known only once the stage ran, e.g. rows=len(df)"""
+        self.args.update(args)
+
+    def __enter__(self):
+        main = threading.current_thread() is threading.main_thread()
+        self.tid = 0 if main else threading.get_ident()
+        self.cpu_clock = time.process_time if main else time.thread_time
+        self.start = time.perf_counter()
+        self.cpu_start = self.cpu_clock()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self.start
+        cpu = self.cpu_clock() - self.cpu_start
+        args = {'cpu_ms': round(cpu * 1e3, 3), 'peak_rss_mb': round(peak_rss_mb(), 1)}
+        args.update(self.args)
+        if exc_type is not None:
+            args['error'] = exc_type.__name__
+        _trace['events'].append({
+            'name': self.name,
+            'cat': 'stage',
+            'ph': 'X',
+            'ts': round((self.start - _trace['origin']) * 1e6, 1),
+            'dur': round(wall * 1e6, 1),
+            'pid': os.getpid(),
+            'tid': self.tid,
+            'args': args
+        })
+        return False
+
+def stage(name, **args):
+    """Context manager timing one stage; a shared no-op unless the trace is enabled"""
+    if _trace is None:
+        return _NULL_SPAN
+    return Span(name, args)
+
+def enabled():
+    return _trace is not None
+
+def enable():
+    global _trace
+    _trace = {'origin': time.perf_counter(), 'events': []}
+
+def collect(fn, *args):
+    """Run fn(*args) in a forked worker and return the events it recorded
+
+    The worker inherits a copy of the parent's event list, so only the events appended
+    during this call are returned; the parent merges them with extend().
+    """
+    first = len(_trace['events'])
+    fn(*args)
+    return _trace['events'][first:]
+
+def extend(events):
+    _trace['events'].extend(events)
+
+def summarize(events):
+    """Totals per stage name: calls, wall and CPU milliseconds, rows, highest peak RSS"""
+    totals = {}
+    for event in events:
+        total = totals.setdefault(event['name'], {'calls': 0, 'wall_ms': 0.0, 'cpu_ms': 0.0,
+                                                  'rows': 0, 'peak_rss_mb': 0.0})
+        total['calls'] += 1
+        total['wall_ms'] = round(total['wall_ms'] + event['dur'] / 1e3, 3)
+        total['cpu_ms'] = round(total['cpu_ms'] + event['args']['cpu_ms'], 3)
+        total['rows'] += event['args'].get('rows', 0)
+        total['peak_rss_mb'] = max(total['peak_rss_mb'], event['args']['peak_rss_mb'])
+    return totals
+
+def write(path, command=None):
+    """Save the recorded events as Chrome trace JSON at path"""
+    events = sorted(_trace['events'], key=lambda event: (event['pid'], event['ts']))
+    names = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+              'args': {'name': 'main' if pid == os.getpid() else f'worker {pid}'}}
+             for pid in sorted({event['pid'] for event in events})]
+    names += [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': 'writer'}}
+              for pid, tid in sorted({(event['pid'], event['tid']) for event in events if event['tid']})]
+    payload = {
+        'traceEvents': names + events,
+        'displayTimeUnit': 'ms',
+        'otherData': {'command': command or sys.argv, 'stages': summarize(events)}
+    }
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=1)
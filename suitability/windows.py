@@ -0,0 +1,158 @@
+"""Rolling growing-season windows over the monthly results
+
+For every county, window length and start month, this module computes the mean
+suitability score and the number of S1 and S1/S2 months. Each quantity gets one
+cumulative sum along the month axis, and every window of every length is then one
+subtraction of two prefix columns. There is no per-window aggregation.
+"""
+
+import pandas as pd
+import numpy as np
+from datetime import datetime
+import os
+
+from .result_store import month_labels
+
+DEFAULT_LENGTHS = (4, 5, 6)
+
+def calendar_axis(store):
+    """Month ids of the store's 'YYYY-MM' axis and the gap-free calendar range they span"""
+    ids = np.array([int(label[:4]) * 12 + int(label[5:]) - 1 for label in store['months']], dtype=np.int64)
+    return ids, np.arange(ids.min(), ids.max() + 1)
+
+def calendar_matrices(store):
+    """codes and scores on a gap-free month axis (missing months: code 0, NaN score)"""
+    ids, calendar = calendar_axis(store)
+    codes = np.zeros((len(store['fips']), len(calendar)), dtype=np.uint8)
+    scores = np.full(codes.shape, np.nan)
+    codes[:, ids - calendar[0]] = store['codes']
+    scores[:, ids - calendar[0]] = store['scores']
+    return calendar, codes, scores
+
+def prefix_sums(matrix, dtype):
+    """(rows, months + 1) cumulative sums with a leading zero column"""
+    prefix = np.zeros((matrix.shape[0], matrix.shape[1] + 1), dtype=dtype)
+    np.cumsum(matrix, axis=1, dtype=dtype, out=prefix[:, 1:])
+    return prefix
+
+def window_sums(prefix, length):
+    """Sums of every `length`-month window, (rows, months - length + 1)"""
+    return prefix[:, length:] - prefix[:, :-length]
+
+def rolling_windows(codes, scores, lengths=DEFAULT_LENGTHS):
+    """Window statistics per length: dict length -> arrays shaped (counties, starts)
+
+    'mean_score' averages the months the county has a row for (No Data months count as
+    0, as in Avg_Score). It is NaN if the window has no such month. 's1_s2_months' and
+    's1_months' count suitable months. 'months_with_data' counts months with a row.
+    """
+    present = codes > 0
+    prefixes = {
+        'score': prefix_sums(np.where(present, scores, 0.0), np.float64),
+        'present': prefix_sums(present, np.int32),
+        's1': prefix_sums(codes == 1, np.int32),
+        's1_s2': prefix_sums((codes == 1) | (codes == 2), np.int32)
+    }
+
+    windows = {}
+    for length in lengths:
+        if not 1 <= length <= codes.shape[1]:
+            raise ValueError(f"Window length {length} must be between 1 and {codes.shape[1]} months")
+        months_with_data = window_sums(prefixes['present'], length)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_score = window_sums(prefixes['score'], length) / months_with_data
+        windows[length] = {
+            'mean_score': np.where(months_with_data > 0, mean_score, np.nan),
+            's1_months': window_sums(prefixes['s1'], length).astype(np.uint16),
+            's1_s2_months': window_sums(prefixes['s1_s2'], length).astype(np.uint16),
+            'months_with_data': months_with_data.astype(np.uint16)
+        }
+    return windows
+
+def window_summary(windows, calendar):
+    """Per (length, start month): counties, mean window score, counties suitable (S1/S2) all window long"""
+    frames = []
+    for length, stats in windows.items():
+        starts = calendar[:stats['mean_score'].shape[1]]
+        complete = stats['months_with_data'] == length
+        fully_suitable = (stats['s1_s2_months'] == length).sum(axis=0)
+        counties = complete.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            frames.append(pd.DataFrame({
+                'Length': length,
+                'Start': month_labels(starts // 12, starts % 12 + 1),
+                'Start_Month_Name': [datetime(2000, int(m) % 12 + 1, 1).strftime('%B') for m in starts],
+                'Counties': counties,
+                'Mean_Score': np.nanmean(np.where(complete, stats['mean_score'], np.nan), axis=0),
+                'Fully_Suitable_Counties': fully_suitable,
+                'Fully_Suitable_Pct': fully_suitable / np.maximum(counties, 1) * 100
+            }))
+    return pd.concat(frames, ignore_index=True)
+
+def best_windows(windows, calendar, fips):
+    """Best calendar start month per county and length, from window means averaged over the years"""
+    frames = []
+    for length, stats in windows.items():
+        starts = calendar[:stats['mean_score'].shape[1]]
+        calendar_month = starts % 12
+
+        # (counties, 12) mean over the years of windows starting in each calendar month
+        by_month = np.full((len(fips), 12), np.nan)
+        suitable = np.full((len(fips), 12), np.nan)
+        for m in range(12):
+            columns = calendar_month == m
+            if columns.any():
+                with np.errstate(invalid='ignore'):
+                    by_month[:, m] = np.nanmean(stats['mean_score'][:, columns], axis=1)
+                suitable[:, m] = stats['s1_s2_months'][:, columns].mean(axis=1)
+
+        has_data = ~np.isnan(by_month).all(axis=1)
+        best = np.argmax(np.where(np.isnan(by_month), -np.inf, by_month), axis=1)
+        rows = np.arange(len(fips))
+        frames.append(pd.DataFrame({
+            'FIPS': fips,
+            'Length': length,
+            'Best_Start_Month': np.where(has_data, best + 1, 0),
+            'Best_Start_Month_Name': [datetime(2000, m + 1, 1).strftime('%B') if ok else ''
+                                      for m, ok in zip(best, has_data)],
+            'Mean_Score': np.where(has_data, by_month[rows, best], np.nan),
+            'Avg_S1_S2_Months': np.where(has_data, suitable[rows, best], np.nan)
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+def windows_to_frame(windows, calendar, fips):
+    """Long format: one row per county, length and start month"""
+    frames = []
+    for length, stats in windows.items():
+        n_starts = stats['mean_score'].shape[1]
+        starts = calendar[:n_starts]
+        frames.append(pd.DataFrame({
+            'FIPS': np.repeat(fips, n_starts),
+            'Length': length,
+            'Start': np.tile(month_labels(starts // 12, starts % 12 + 1), len(fips)),
+            'Mean_Score': stats['mean_score'].ravel(),
+            'S1_Months': stats['s1_months'].ravel(),
+            'S1_S2_Months': stats['s1_s2_months'].ravel(),
+            'Months_With_Data': stats['months_with_data'].ravel()
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+def write_windows(store, lengths, output_dir, long_csv=False):
+    """windows.npz, window_summary.csv, best_windows.csv (and windows.csv if long_csv)"""
+    calendar, codes, scores = calendar_matrices(store)
+    windows = rolling_windows(codes, scores, lengths)
+    fips = np.asarray(store['fips'])
+
+    os.makedirs(output_dir, exist_ok=True)
+    arrays = {'fips': fips, 'months': month_labels(calendar // 12, calendar % 12 + 1),
+              'lengths': np.array(list(windows))}
+    for length, stats in windows.items():
+        arrays.update({f'{name}_{length}': values for name, values in stats.items()})
+    np.savez(os.path.join(output_dir, 'windows.npz'), **arrays)
+
+    summary = window_summary(windows, calendar)
+    summary.to_csv(os.path.join(output_dir, 'window_summary.csv'), index=False)
+    best_windows(windows, calendar, fips).to_csv(os.path.join(output_dir, 'best_windows.csv'), index=False)
+    if long_csv:
+        windows_to_frame(windows, calendar, fips).to_csv(os.path.join(output_dir, 'windows.csv'), index=False)
+    return summary
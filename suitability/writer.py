@@ -0,0 +1,90 @@
+"""Bounded background writer for finished outputs
+
+The monthly loop hands finished artifacts (a map figure, a month's rows, a chart) to
+writer.submit(fn, *args) and goes on computing the next month. A small thread pool calls
+fn(*args). At most threads + pending writes are outstanding at once. Beyond that, submit()
+blocks until one finishes, which bounds memory held by queued artifacts.
+
+A failed write is re-raised by the next submit() and by flush(), and flush() runs when
+the `with` block exits. So a run whose write failed still fails. INLINE has the same
+interface and writes immediately. Code that takes a writer defaults to it.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, wait
+import threading
+
+DEFAULT_THREADS = 2
+DEFAULT_PENDING = 4
+
+class InlineWriter:
+    """Writes in the calling thread; the default when no background writer is running"""
+    __slots__ = ()
+
+    def submit(self, fn, *args):
+        fn(*args)
+
+    def flush(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+INLINE = InlineWriter()
+
+class BackgroundWriter:
+    def __init__(self, threads=DEFAULT_THREADS, pending=DEFAULT_PENDING):
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='writer')
+        self._slots = threading.BoundedSemaphore(threads + pending)
+        self._lock = threading.Lock()
+        self._outstanding = set()
+        self._error = None
+
+    def _done(self, future):
+        with self._lock:
+            self._outstanding.discard(future)
+            if self._error is None and not future.cancelled() and future.exception() is not None:
+                self._error = future.exception()
+        self._slots.release()
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise self._error
+
+    def submit(self, fn, *args):
+        """Queue fn(*args); blocks while the queue is full, raises an earlier write's error"""
+        self._raise_error()
+        self._slots.acquire()
+        future = self._pool.submit(fn, *args)
+        with self._lock:
+            self._outstanding.add(future)
+        future.add_done_callback(self._done)
+
+    def flush(self):
+        """Wait for every queued write; raises the first error any of them hit"""
+        with self._lock:
+            outstanding = list(self._outstanding)
+        wait(outstanding)
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.flush()
+        finally:
+            # On any error drop the queued writes, let running ones finish, keep the first error
+            with self._lock:
+                outstanding = list(self._outstanding)
+            for future in outstanding:
+                future.cancel()
+            self._pool.shutdown(wait=True)
+        return False
+
+def output_writer(threads):
+    """BackgroundWriter with this many threads, or INLINE for 0"""
+    return BackgroundWriter(threads) if threads > 0 else INLINE